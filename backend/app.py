@@ -3,61 +3,580 @@ import io
 import json
 import os
 import tempfile
+import time
 
-import pyzipper
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-from services import document, image, video
+from services import (
+    archive,
+    cache,
+    document,
+    image,
+    jobs,
+    models,
+    ocr,
+    uploads,
+    video,
+)
 
 load_dotenv()
 
 PORT = int(os.getenv("PORT", 5000))
 ENVIRONMENT = os.getenv("environment", "development")
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", 256))
+NLP_PROCESSES = int(os.getenv("NLP_PROCESSES", 1))
+# Per-level NER tier overrides, e.g. "Low=rules,High=lg"
+NER_MODELS = dict(document.level_ner_models)
+for entry in filter(str.strip, os.getenv("NER_MODELS", "").split(",")):
+    level, ner_model = (part.strip() for part in entry.split("=", 1))
+    if level not in document.levels or ner_model not in document.ner_models:
+        raise ValueError(f"Invalid NER_MODELS entry: {entry}")
+    NER_MODELS[level] = ner_model
+REDACT_WORKERS = int(os.getenv("REDACT_WORKERS", os.cpu_count() or 1))
+REDACT_CHUNK_SIZE = int(os.getenv("REDACT_CHUNK_SIZE", 16))
+REDACT_MIN_PARALLEL_PAGES = int(os.getenv("REDACT_MIN_PARALLEL_PAGES", 64))
+REDACT_PDF_GARBAGE = int(os.getenv("REDACT_PDF_GARBAGE", 3))
+REDACT_PDF_DEFLATE = os.getenv("REDACT_PDF_DEFLATE", "true").lower() == "true"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 128))
+CACHE_MAX_MEMORY_BYTES = int(os.getenv("CACHE_MAX_MEMORY_BYTES", 256 * 1024 * 1024))
+CACHE_DIR = os.getenv("CACHE_DIR")
+CACHE_MAX_DISK_BYTES = int(os.getenv("CACHE_MAX_DISK_BYTES", 1024 * 1024 * 1024))
+BLUR_MODE = os.getenv("BLUR_MODE", "pixelate")
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 4))
+OCR_JOBS = int(os.getenv("OCR_JOBS", 0)) or None  # None lets ocrmypdf use every CPU
+OCR_SELECTIVE = os.getenv("OCR_SELECTIVE", "true").lower() == "true"
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", 20))
+IMAGE_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_SIZE", 8))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 4))
+IMAGE_TEXT_PROPOSALS = os.getenv("IMAGE_TEXT_PROPOSALS", "true").lower() == "true"
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", 8))
+VIDEO_KEYFRAME_INTERVAL = int(os.getenv("VIDEO_KEYFRAME_INTERVAL", 1))
+VIDEO_CHANGE_DETECTOR = os.getenv("VIDEO_CHANGE_DETECTOR", "diff")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(tempfile.gettempdir(), "redact-jobs"))
+JOB_DB = os.getenv("JOB_DB")
+JOB_TTL = int(os.getenv("JOB_TTL", 24 * 3600)) or None  # None keeps finished jobs
+WARM_MODELS = os.getenv("WARM_MODELS", "")
+UPLOAD_MEMORY_BYTES = int(os.getenv("UPLOAD_MEMORY_BYTES", 1024 * 1024))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Models are loaded on first use unless listed here ("all" loads every model this
+# configuration uses: the NER tiers in NER_MODELS, YOLO and the OCR backend)
+if WARM_MODELS == "all":
+    models.warm_up(
+        sorted({f"spacy-{tier}" for tier in NER_MODELS.values() if tier != "rules"})
+        + ["yolo-face"]
+    )
+    ocr.get_backend(OCR_BACKEND)
+elif WARM_MODELS:
+    models.warm_up([name.strip() for name in WARM_MODELS.split(",")])
+
+if UPLOAD_DIR:
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+class Request(uploads.SpooledRequest):
+    max_memory_bytes = UPLOAD_MEMORY_BYTES
+    directory = UPLOAD_DIR
+
 
 app = Flask(__name__)
+app.request_class = Request
+app.logger.setLevel(LOG_LEVEL)
 CORS(app, methods="*", origins="*")
 
+result_cache = cache.ResultCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_memory_bytes=CACHE_MAX_MEMORY_BYTES,
+    directory=CACHE_DIR,
+    max_disk_bytes=CACHE_MAX_DISK_BYTES,
+)
+
+
+def ocr_job(input_path, output_path, progress):
+    pdf_bytes = document.ocr(
+        input_path,
+        progress=progress,
+        jobs=OCR_JOBS,
+        selective=OCR_SELECTIVE,
+        min_chars=OCR_MIN_CHARS,
+    )
+    with open(output_path, "wb") as output_file:
+        output_file.write(pdf_bytes)
+
+
+def redact_video_job(input_path, output_path, progress):
+    stats = video.process_video_file(
+        input_path,
+        output_path,
+        batch_size=VIDEO_BATCH_SIZE,
+        keyframe_interval=VIDEO_KEYFRAME_INTERVAL,
+        change_detector=VIDEO_CHANGE_DETECTOR,
+        blur_mode=BLUR_MODE,
+        ocr_backend=OCR_BACKEND,
+        progress=progress,
+    )
+    app.logger.info("Video redaction stages: %s", video.describe_stats(stats))
+
+
+# Job kind -> (upload field, result key, mimetype, download name)
+job_kinds = {
+    "redact-video": ("video", "video", "video/mp4", "redacted.mp4"),
+    "ocr": ("pdf", "pdf", "application/pdf", "ocr.pdf"),
+}
+
+job_queue = jobs.JobQueue(
+    {"redact-video": redact_video_job, "ocr": ocr_job},
+    JOB_DIR,
+    store=jobs.SQLiteJobStore(JOB_DB) if JOB_DB else None,
+    workers=JOB_WORKERS,
+    ttl=JOB_TTL,
+)
+
+
+def get_stream_format():
+    """Returns "ndjson" or "sse" when the client asked for a streamed response."""
+    stream = request.args.get("stream") or request.form.get("stream")
+    if stream in ("ndjson", "sse"):
+        return stream
+
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/x-ndjson", "text/event-stream"]
+    )
+    if best == "application/x-ndjson":
+        return "ndjson"
+    if best == "text/event-stream":
+        return "sse"
+    return None
+
+
+def stream_pages(pages, stream_format):
+    """Streams (page_num, redactions) pairs as NDJSON lines or Server-Sent Events."""
+    return stream_events(
+        (
+            ("page", {"page": page_num, "redactions": redactions})
+            for page_num, redactions in pages
+        ),
+        stream_format,
+    )
+
+
+def stream_events(events, stream_format):
+    """Streams (event name, payload) pairs as NDJSON lines or Server-Sent Events."""
+
+    def generate():
+        for event, payload in events:
+            payload = json.dumps(payload)
+            if stream_format == "sse":
+                yield f"event: {event}\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+        if stream_format == "sse":
+            yield "event: end\ndata: {}\n\n"
+
+    mimetype = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    # Keep reverse proxies from buffering the stream
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def wants_binary(mimetype):
+    """Whether the client opted into a raw body instead of base64-in-JSON."""
+    if (request.args.get("format") or request.form.get("format")) == "binary":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", mimetype])
+    return best == mimetype
+
+
+def bytes_response(data, key, mimetype, filename):
+    """Returns `data` raw when requested, else as {key: base64} for older clients."""
+    if data is None:
+        return jsonify({key: None})
+    if wants_binary(mimetype):
+        return send_file(io.BytesIO(data), mimetype=mimetype, download_name=filename)
+    return jsonify({key: base64.b64encode(data).decode("utf-8")})
+
+
+def file_response(path, key, mimetype, filename, remove=True):
+    """Like bytes_response, but streams the file at `path`, removing it afterwards."""
+    if wants_binary(mimetype):
+        response = send_file(path, mimetype=mimetype, download_name=filename)
+        if remove:
+            response.call_on_close(lambda: os.remove(path))
+        return response
+
+    try:
+        with open(path, "rb") as output_file:
+            return jsonify({key: base64.b64encode(output_file.read()).decode("utf-8")})
+    finally:
+        if remove:
+            os.remove(path)
+
+
+def detach_uploads(uploaded_files):
+    """Takes the streams of uploaded files away from the request.
+
+    The request closes its files once the view returns, before a streamed response
+    has read them; the caller closes the returned streams instead.
+    """
+    streams = []
+    for uploaded_file in uploaded_files:
+        streams.append(uploaded_file.stream)
+        uploaded_file.stream = io.BytesIO()
+    return streams
+
+
+def close_after(items, streams):
+    """Passes items through, closing streams once they are exhausted."""
+    try:
+        yield from items
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+def stream_base64_json(chunks, key):
+    """Streams byte chunks as {key: base64} without holding them all in memory."""
+
+    def generate():
+        yield "{" + json.dumps(key) + ': "'
+        remainder = b""
+        for chunk in chunks:
+            data = remainder + chunk
+            # Encode whole 3-byte groups so the pieces join into valid base64
+            cut = len(data) - len(data) % 3
+            remainder = data[cut:]
+            yield base64.b64encode(data[:cut]).decode("utf-8")
+        yield base64.b64encode(remainder).decode("utf-8") + '"}'
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def cache_pages(cache_key, pages):
+    """Passes page results through, caching them once the whole document is done."""
+    collected = []
+    for page in pages:
+        collected.append(page)
+        yield page
+    result_cache.set(cache_key, collected)
+
 
 @app.route("/redact", methods=["POST"])
 def redact_text():
     pdf_file = request.files["pdf"]
     level = request.form.get("level")
+    if level == None:
+        level = "High"
+    if level not in document.levels:
+        return jsonify(None)
+
+    # A path if the upload was spooled to disk, else its bytes
+    pdf_source = uploads.upload_source(pdf_file)
+    ner_model = NER_MODELS[level]
+    cache_key = result_cache.key(
+        pdf_source, "redact", level=level, ner_model=ner_model
+    )
+    pages = result_cache.get(cache_key)
+    if pages is None:
+        pages = cache_pages(
+            cache_key,
+            document.iter_redactions(
+                pdf_source,
+                level,
+                batch_size=NLP_BATCH_SIZE,
+                n_process=NLP_PROCESSES,
+                workers=REDACT_WORKERS,
+                chunk_size=REDACT_CHUNK_SIZE,
+                min_parallel_pages=REDACT_MIN_PARALLEL_PAGES,
+                ner_model=ner_model,
+            ),
+        )
+
+    stream_format = get_stream_format()
+    if stream_format is not None:
+        # Pages are read after the view returns, so keep the upload open until then
+        streams = detach_uploads([pdf_file])
+        return stream_pages(close_after(pages, streams), stream_format)
+
     redactions = []
-    if level != None:
-        redactions = document.redact(pdf_file, level)
-    else:
-        redactions = document.redact(pdf_file, level="High")
+    for _, page_redactions in pages:
+        redactions.extend(page_redactions)
     return jsonify(redactions)
 
 
 @app.route("/redact-image", methods=["POST"])
 def redact_image():
     image_file = request.files["image"]
-    base64 = image.detect_and_blur_faces_and_text(image_file)
-    return jsonify({"image": base64})
+    image_contents = image_file.read()
+    cache_key = result_cache.key(
+        image_contents,
+        "redact-image",
+        blur_mode=BLUR_MODE,
+        # The backend "auto" resolves to; the two read text differently
+        ocr_backend=ocr.get_backend(OCR_BACKEND).name,
+        text_proposals=IMAGE_TEXT_PROPOSALS,
+    )
+    image_bytes = result_cache.get(cache_key)
+    if image_bytes is None:
+        image_bytes = image.detect_and_blur_faces_and_text(
+            io.BytesIO(image_contents),
+            blur_mode=BLUR_MODE,
+            ocr_backend=OCR_BACKEND,
+            text_proposals=IMAGE_TEXT_PROPOSALS,
+            ocr_workers=OCR_WORKERS,
+        )
+        result_cache.set(cache_key, image_bytes)
+    return bytes_response(image_bytes, "image", "image/jpeg", "redacted.jpg")
+
+
+@app.route("/redact-images", methods=["POST"])
+def redact_images():
+    image_files = request.files.getlist("images")
+    # Always streamed; NDJSON unless SSE was asked for
+    stream_format = get_stream_format() or "ndjson"
+    # Read up front, the uploads are closed once streaming starts
+    started = time.perf_counter()
+    filenames = [image_file.filename for image_file in image_files]
+    contents = [image_file.read() for image_file in image_files]
+
+    def events():
+        ocr_backend = ocr.get_backend(OCR_BACKEND).name
+        cache_keys = [
+            result_cache.key(
+                image_contents,
+                "redact-image",
+                blur_mode=BLUR_MODE,
+                ocr_backend=ocr_backend,
+                text_proposals=IMAGE_TEXT_PROPOSALS,
+            )
+            for image_contents in contents
+        ]
+
+        latencies = []
+
+        def image_event(index, image_bytes, seconds):
+            latencies.append(seconds)
+            encoded = None
+            if image_bytes is not None:
+                encoded = base64.b64encode(image_bytes).decode("utf-8")
+            return "image", {
+                "index": index,
+                "filename": filenames[index],
+                "image": encoded,
+                "seconds": round(seconds, 3),
+            }
+
+        # Cached images go out first, the rest as they finish
+        misses = []
+        for index, cache_key in enumerate(cache_keys):
+            image_bytes = result_cache.get(cache_key)
+            if image_bytes is None:
+                misses.append(index)
+            else:
+                yield image_event(index, image_bytes, 0.0)
+
+        for position, image_bytes, seconds in image.iter_redact_images(
+            [io.BytesIO(contents[index]) for index in misses],
+            batch_size=IMAGE_BATCH_SIZE,
+            workers=IMAGE_WORKERS,
+            blur_mode=BLUR_MODE,
+            ocr_backend=OCR_BACKEND,
+            text_proposals=IMAGE_TEXT_PROPOSALS,
+            ocr_workers=OCR_WORKERS,
+        ):
+            index = misses[position]
+            if image_bytes is not None:
+                result_cache.set(cache_keys[index], image_bytes)
+            yield image_event(index, image_bytes, seconds)
+
+        seconds = time.perf_counter() - started
+        latencies.sort()
+        yield "summary", {
+            "summary": {
+                "images": len(contents),
+                "seconds": round(seconds, 3),
+                "images_per_second": round(len(contents) / seconds, 2),
+                "latency_p50": percentile(latencies, 0.5),
+                "latency_p95": percentile(latencies, 0.95),
+                "latency_max": percentile(latencies, 1.0),
+            }
+        }
+
+    return stream_events(events(), stream_format)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return round(sorted_values[rank], 3)
 
 
 @app.route("/redact-pdf", methods=["POST"])
 def redact_pdf():
     pdf_file = request.files["pdf"]
     words = json.loads(request.form["words"])
-    base64 = document.redact_pdf(pdf_file, words)
-    return jsonify({"pdf": base64})
+    pdf_bytes = document.redact_pdf(
+        uploads.upload_source(pdf_file),
+        words,
+        garbage=REDACT_PDF_GARBAGE,
+        deflate=REDACT_PDF_DEFLATE,
+    )
+    return bytes_response(pdf_bytes, "pdf", "application/pdf", "redacted.pdf")
 
 
 @app.route("/redact-video", methods=["POST"])
 def redact_video():
     video_file = request.files["video"]
-    base64 = video.process_video(video_file.read())
-    return jsonify({"video": base64})
+    # Read in place if the upload was spooled to disk
+    input_path = uploads.upload_path(video_file)
+    saved_input = input_path is None
+    if saved_input:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as input_file:
+            video_file.save(input_file)
+        input_path = input_file.name
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as output_file:
+        pass
+
+    try:
+        stats = video.process_video_file(
+            input_path,
+            output_file.name,
+            batch_size=VIDEO_BATCH_SIZE,
+            keyframe_interval=VIDEO_KEYFRAME_INTERVAL,
+            change_detector=VIDEO_CHANGE_DETECTOR,
+            blur_mode=BLUR_MODE,
+            ocr_backend=OCR_BACKEND,
+        )
+    except Exception:
+        os.remove(output_file.name)
+        raise
+    finally:
+        if saved_input:
+            os.remove(input_path)
+
+    app.logger.info("Video redaction stages: %s", video.describe_stats(stats))
+    return file_response(output_file.name, "video", "video/mp4", "redacted.mp4")
 
 
 @app.route("/ocr", methods=["POST"])
 def ocr_pdf():
     pdf_file = request.files["pdf"]
-    base64 = document.ocr(pdf_file)
-    return jsonify({"pdf": base64})
+    pdf_source = uploads.upload_source(pdf_file)
+    cache_key = result_cache.key(
+        pdf_source, "ocr", selective=OCR_SELECTIVE, min_chars=OCR_MIN_CHARS
+    )
+    pdf_bytes = result_cache.get(cache_key)
+    if pdf_bytes is None:
+        pdf_bytes = document.ocr(
+            pdf_source,
+            jobs=OCR_JOBS,
+            selective=OCR_SELECTIVE,
+            min_chars=OCR_MIN_CHARS,
+        )
+        result_cache.set(cache_key, pdf_bytes)
+    return bytes_response(pdf_bytes, "pdf", "application/pdf", "ocr.pdf")
+
+
+@app.route("/ocr-redact", methods=["POST"])
+def ocr_redact_pdf():
+    pdf_file = request.files["pdf"]
+    level = request.form.get("level") or "High"
+    if level not in document.levels:
+        return jsonify(None)
+
+    pdf_source = uploads.upload_source(pdf_file)
+    ner_model = NER_MODELS[level]
+    cache_key = result_cache.key(
+        pdf_source,
+        "ocr-redact",
+        level=level,
+        ner_model=ner_model,
+        selective=OCR_SELECTIVE,
+        min_chars=OCR_MIN_CHARS,
+    )
+    result = result_cache.get(cache_key)
+    if result is None:
+        result = document.ocr_redact(
+            pdf_source,
+            level,
+            jobs=OCR_JOBS,
+            selective=OCR_SELECTIVE,
+            min_chars=OCR_MIN_CHARS,
+            batch_size=NLP_BATCH_SIZE,
+            n_process=NLP_PROCESSES,
+            workers=REDACT_WORKERS,
+            chunk_size=REDACT_CHUNK_SIZE,
+            min_parallel_pages=REDACT_MIN_PARALLEL_PAGES,
+            ner_model=ner_model,
+        )
+        result_cache.set(cache_key, result)
+
+    pdf_bytes, redactions = result
+    return jsonify(
+        {
+            "pdf": base64.b64encode(pdf_bytes).decode("utf-8"),
+            "redactions": redactions,
+        }
+    )
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+@app.route("/models/stats", methods=["GET"])
+def model_stats():
+    return jsonify(models.stats())
+
+
+@app.route("/jobs/<kind>", methods=["POST"])
+def submit_job(kind):
+    if kind not in job_kinds:
+        return jsonify({"error": f"Unknown job kind: {kind}"}), 404
+
+    field = job_kinds[kind][0]
+    job = job_queue.submit(kind, request.files[field])
+    return jsonify(job), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    path = job_queue.result_path(job_id)
+    if path is None:
+        if job["status"] == jobs.DELETED:
+            return jsonify({"error": "Job was deleted"}), 404
+        return jsonify(job), 409
+
+    _, key, mimetype, filename = job_kinds[job["kind"]]
+    return file_response(path, key, mimetype, filename, remove=False)
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    job_queue.delete(job_id)
+    return "", 204
 
 
 @app.route("/zip", methods=["POST"])
@@ -70,53 +589,20 @@ def zip_files():
     password = request.form.get("password", "")  # Optional password for encryption
     compression_level = int(
         request.form.get("compression_level", "5")
-    )  # Default compression level is 5
-
-    # Create temporary files for each uploaded file
-    file_paths = []
-    file_names = []
-
-    for index, uploaded_file in enumerate(uploaded_files):
-        # Create a temporary file and write the uploaded file content
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False
-        )  # Create a temporary file, don't delete on close
-        temp_file.write(
-            uploaded_file.read()
-        )  # Write the uploaded file content to temp file
-        temp_file.flush()  # Ensure the data is written to disk
-        file_paths.append(temp_file.name)  # Store the temp file path for zipping
-        file_names.append(names[index])  # Use the provided file names
-        temp_file.close()  # Close the file, but don't delete it yet
-
-    # Create a temporary file for the zip output
-    with tempfile.NamedTemporaryFile(delete=False) as zip_temp_file:
-        zip_output_path = zip_temp_file.name  # Store the temporary zip file path
-
-    # Perform the zipping operation using pyzipper with optional password protection
-
-    with pyzipper.AESZipFile(
-        zip_output_path, "w", compression=pyzipper.ZIP_DEFLATED, encryption=pyzipper.WZ_AES
-    ) as zip_file:
-        if password:
-            zip_file.setpassword(password.encode("utf-8"))
-
-        for file_path, file_name in zip(file_paths, file_names):
-            zip_file.write(file_path, arcname=file_name)
-
-
-    # Read the zipped file and encode it in base64
-    with open(zip_output_path, "rb") as zip_file:
-        zip_base64 = base64.b64encode(zip_file.read()).decode("utf-8")
-
-    # Clean up temporary files (both the individual files and the zip file)
-    for temp_file in file_paths:
-        os.remove(temp_file)  # Remove each temporary file after use
-    os.remove(zip_output_path)  # Remove the temporary zip file
-    os.remove(file_names[0])
-
-    # Return the base64-encoded ZIP string
-    return jsonify({"zip_base64": zip_base64})
+    )  # Default compression level is 5; 0 stores files uncompressed
+    if not 0 <= compression_level <= 9:
+        return jsonify({"error": "compression_level must be between 0 and 9"}), 400
+
+    # Zip the uploads straight from their request streams as the response is sent
+    streams = detach_uploads(uploaded_files)
+    chunks = close_after(
+        archive.iter_zip(zip(names, streams), password, compression_level), streams
+    )
+    if wants_binary("application/zip"):
+        response = Response(stream_with_context(chunks), mimetype="application/zip")
+        response.headers["Content-Disposition"] = "attachment; filename=files.zip"
+        return response
+    return stream_base64_json(chunks, "zip_base64")
 
 
 if __name__ == "__main__":
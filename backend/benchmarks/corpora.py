@@ -0,0 +1,215 @@
+"""Deterministic synthetic inputs for the benchmark suite.
+
+Every generator is seeded, so two runs with the same arguments build byte-identical
+documents, images and videos.
+"""
+
+import random
+
+import cv2
+import numpy as np
+import pymupdf
+
+first_names = ["Priya", "Rahul", "Anita", "John", "Maria", "Wei", "Fatima", "Arjun"]
+last_names = ["Sharma", "Iyer", "Doe", "Garcia", "Chen", "Khan", "Patel", "Mehta"]
+filler_words = (
+    "the agreement between parties shall remain in effect until terminated by "
+    "either side with written notice and all amounts due under this contract are "
+    "payable within thirty days of the invoice"
+).split()
+
+
+def digits(rng, count):
+    return "".join(str(rng.randint(0, 9)) for _ in range(count))
+
+
+def letters(rng, count):
+    return "".join(chr(ord("A") + rng.randint(0, 25)) for _ in range(count))
+
+
+def pii_values(rng):
+    """One seeded value of each pattern-matched PII kind, keyed by scanner group."""
+    first, last = rng.choice(first_names), rng.choice(last_names)
+    return {
+        "email": f"{first}.{last}{rng.randint(1, 99)}@example.com".lower(),
+        "phone": str(rng.randint(6, 9)) + digits(rng, 9),
+        "aadhaar": " ".join(digits(rng, 4) for _ in range(3)),
+        "pan": letters(rng, 5) + digits(rng, 4) + letters(rng, 1),
+        "credit_card": "-".join(digits(rng, 4) for _ in range(4)),
+    }
+
+
+def pii_sentence(rng):
+    """A line of contract text mentioning a person and their PII.
+
+    Returns the line and the PII values seeded into it.
+    """
+    values = pii_values(rng)
+    name = f"{rng.choice(first_names)} {rng.choice(last_names)}"
+    kind = rng.choice(list(values))
+    value = values[kind]
+    line = f"{name} ({kind.replace('_', ' ')} {value}) signed on 12 March 2021"
+    return line, [value]
+
+
+def filler_sentence(rng, words=10):
+    return " ".join(rng.choice(filler_words) for _ in range(words))
+
+
+def make_text_pdf(pages, seed=0, lines=40, pii_lines=6):
+    """Builds a digital PDF of contract-like text with seeded PII.
+
+    Returns the PDF bytes and the PII values seeded into it.
+    """
+    rng = random.Random(seed)
+    pdf_document = pymupdf.open()
+    seeded = []
+    for _ in range(pages):
+        page = pdf_document.new_page()
+        pii_at = set(rng.sample(range(lines), pii_lines))
+        for line in range(lines):
+            if line in pii_at:
+                text, values = pii_sentence(rng)
+                seeded.extend(values)
+            else:
+                text = filler_sentence(rng)
+            page.insert_text((40, 50 + line * 18), text, fontsize=10)
+    pdf_bytes = to_bytes(pdf_document)
+    pdf_document.close()
+    return pdf_bytes, seeded
+
+
+def to_bytes(pdf_document):
+    # Without the creation date and random file ID the bytes depend on the seed only
+    pdf_document.set_metadata({})
+    return pdf_document.tobytes(garbage=3, deflate=True, no_new_id=True)
+
+
+def render_text_image(lines, width=1275, height=1650, scale=0.8):
+    """White page image with the lines of text drawn on it, like a 150 dpi scan."""
+    image = np.full((height, width, 3), 250, dtype=np.uint8)
+    for line_number, line in enumerate(lines):
+        origin = (60, 70 + line_number * 40)
+        cv2.putText(
+            image, line, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (15, 15, 15), 2
+        )
+    return image
+
+
+def make_scanned_pdf(pages, seed=0, lines=30, pii_lines=4):
+    """Builds a PDF of page images without a text layer, as a scanner would.
+
+    Returns the PDF bytes and the PII values drawn on the pages.
+    """
+    rng = random.Random(seed)
+    pdf_document = pymupdf.open()
+    seeded = []
+    for _ in range(pages):
+        pii_at = set(rng.sample(range(lines), pii_lines))
+        page_lines = []
+        for line in range(lines):
+            if line in pii_at:
+                text, values = pii_sentence(rng)
+                seeded.extend(values)
+            else:
+                text = filler_sentence(rng, 8)
+            page_lines.append(text)
+        _, png = cv2.imencode(".png", render_text_image(page_lines))
+        page = pdf_document.new_page()
+        page.insert_image(page.rect, stream=png.tobytes())
+    pdf_bytes = to_bytes(pdf_document)
+    pdf_document.close()
+    return pdf_bytes, seeded
+
+
+def draw_face(image, center, size):
+    """Draws a face-like patch: a skin-toned oval with eyes and a mouth."""
+    x, y = center
+    cv2.ellipse(image, center, (size, int(size * 1.3)), 0, 0, 360, (150, 180, 220), -1)
+    for eye_x in (x - size // 3, x + size // 3):
+        cv2.circle(image, (eye_x, y - size // 4), max(size // 8, 2), (40, 40, 40), -1)
+    cv2.ellipse(
+        image, (x, y + size // 2), (size // 3, size // 8), 0, 0, 180, (60, 60, 140), 2
+    )
+
+
+def background(rng, width, height):
+    """A smooth, photo-like background of large blurred blobs."""
+    noise = rng.integers(0, 255, (height // 32 + 1, width // 32 + 1, 3), dtype=np.uint8)
+    image = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    return cv2.GaussianBlur(image, (31, 31), 0)
+
+
+def make_images(count, seed=0, width=1600, height=1200):
+    """Builds jpg photos with face-like patches and a card of PII text.
+
+    Returns the jpg bytes of each image and the PII values drawn on them.
+    """
+    rng = np.random.default_rng(seed)
+    text_rng = random.Random(seed)
+    images = []
+    seeded = []
+    for _ in range(count):
+        image = background(rng, width, height)
+        for _ in range(int(rng.integers(1, 4))):
+            center = (
+                int(rng.integers(150, width // 2)),
+                int(rng.integers(200, height - 200)),
+            )
+            draw_face(image, center, int(rng.integers(50, 110)))
+
+        card_x, card_y = width // 2 + 40, height // 2
+        cv2.rectangle(
+            image, (card_x, card_y), (width - 40, card_y + 260), (235, 235, 235), -1
+        )
+        values = pii_values(text_rng)
+        card_lines = [
+            f"{text_rng.choice(first_names)} {text_rng.choice(last_names)}",
+            values["email"],
+            values["phone"],
+        ]
+        seeded.extend(card_lines[1:])
+        for line_number, line in enumerate(card_lines):
+            origin = (card_x + 25, card_y + 70 + line_number * 70)
+            cv2.putText(
+                image, line, origin, cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2
+            )
+
+        _, jpg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        images.append(jpg.tobytes())
+    return images, seeded
+
+
+def make_video(path, frames, seed=0, width=640, height=360, fps=25):
+    """Writes an mp4 with a moving face-like patch and a scrolling line of PII text.
+
+    The scene cuts every 50 frames, so change detection sees both static stretches
+    and new content.
+    """
+    rng = np.random.default_rng(seed)
+    text_rng = random.Random(seed)
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
+    )
+    try:
+        for index in range(frames):
+            if index % 50 == 0:
+                scene = background(rng, width, height)
+                values = pii_values(text_rng)
+                caption = f"Call {values['phone']} or mail {values['email']}"
+            frame = scene.copy()
+            step = index % 50
+            draw_face(frame, (120 + step * 4, height // 2 - 30), 45)
+            cv2.putText(
+                frame,
+                caption,
+                (20 + step * 2, height - 40),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.7,
+                (255, 255, 255),
+                2,
+            )
+            writer.write(frame)
+    finally:
+        writer.release()
+    return frames
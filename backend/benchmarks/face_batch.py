@@ -0,0 +1,53 @@
+"""Benchmark: YOLO face detection throughput vs. batch size on CPU.
+
+Run from the backend directory (needs yolov8n-face.pt in the working directory):
+
+    python -m benchmarks.face_batch --frames 64 --batch-sizes 1 2 4 8 16
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from services import video
+
+
+def make_frames(count, width, height, seed=0):
+    """Builds deterministic frames with a few bright face-sized ellipses on noise."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for index in range(count):
+        frame = rng.integers(0, 80, (height, width, 3), dtype=np.uint8)
+        for face in range(3):
+            center = (
+                int((face + 1) * width / 4 + 10 * np.sin(index / 5)),
+                height // 2,
+            )
+            cv2.ellipse(frame, center, (60, 80), 0, 0, 360, (150, 180, 220), -1)
+        frames.append(frame)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.width, args.height)
+    video.detect_faces_batch(frames[:1])  # Warm up the model outside the timed runs
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(frames), batch_size):
+            video.detect_faces_batch(frames[offset : offset + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"batch {batch_size:>3}: {len(frames) / elapsed:6.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
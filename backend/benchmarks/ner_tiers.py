@@ -0,0 +1,130 @@
+"""Benchmark: throughput and recall of each NER tier on synthetic labelled spans.
+
+Tiers whose spaCy package is not installed are skipped. The full en_core_web_sm
+pipeline is included to show what trimming it to tokenizer + NER saves.
+
+Run from the backend directory:
+
+    python -m benchmarks.ner_tiers --spans 5000
+"""
+
+import argparse
+import random
+import time
+
+from services import document, models, pii
+
+names = ["Priya Sharma", "Rahul Verma", "John Smith", "Anita Desai", "Maria Garcia"]
+orgs = ["Infosys", "the Reserve Bank of India", "Google", "Tata Motors", "UNICEF"]
+places = ["Mumbai", "New Delhi", "Bangalore", "London", "Chennai"]
+dates = ["12 March 2021", "January 5, 2019", "last Tuesday", "2020", "14/08/2022"]
+filler = "the agreement between parties shall remain in force until terminated".split()
+
+
+def make_spans(count, seed=0):
+    """Builds spans with their expected (text, category) entities."""
+    rng = random.Random(seed)
+    samples = [
+        lambda n, o, p, d: (
+            f"{n} joined {o} in {p} on {d}.",
+            [(n, "Names"), (o, "Organization"), (p, "Addresses"), (d, "Dates")],
+        ),
+        lambda n, o, p, d: (
+            f"Signed by {n} at {p}.",
+            [(n, "Names"), (p, "Addresses")],
+        ),
+        lambda n, o, p, d: (
+            f"Invoice issued by {o} dated {d}.",
+            [(o, "Organization"), (d, "Dates")],
+        ),
+        lambda n, o, p, d: (
+            f"Contact {n.split()[0].lower()}@example.com or +91 9876543210.",
+            [
+                (f"{n.split()[0].lower()}@example.com", "Emails"),
+                ("+91 9876543210", "Phone Numbers"),
+            ],
+        ),
+        lambda n, o, p, d: (
+            f"PAN ABCDE{rng.randint(1000, 9999)}F of {n}",
+            [(None, "PAN Number"), (n, "Names")],
+        ),
+    ]
+    spans = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            sample = rng.choice(samples)(
+                rng.choice(names), rng.choice(orgs), rng.choice(places), rng.choice(dates)
+            )
+        else:
+            sample = (" ".join(rng.choices(filler, k=rng.randint(3, 12))), [])
+        spans.append(sample)
+    return spans
+
+
+def found(span_text, expected, doc):
+    """Whether a tier would redact the expected (text, category) entity.
+
+    A text of None means any match of that PII category counts.
+    """
+    text, category = expected
+    for start, end, pii_category in pii.scan(span_text, pii.all_groups):
+        if pii_category == category or (text and text in span_text[start:end]):
+            return True
+    if doc is None or category not in document.custom_categories:
+        return False
+    labels = document.custom_categories[category]
+    return any(
+        entity.label_ in labels and (text in entity.text or entity.text in text)
+        for entity in doc.ents
+    )
+
+
+def run(name, nlp, spans, batch_size):
+    texts = [text for text, _ in spans]
+    started = time.perf_counter()
+    docs = list(nlp.pipe(texts, batch_size=batch_size)) if nlp else [None] * len(texts)
+    for text in texts:
+        pii.scan(text, pii.all_groups)
+    elapsed = time.perf_counter() - started
+
+    hits, totals = {}, {}
+    for (text, expected_entities), doc in zip(spans, docs):
+        for expected in expected_entities:
+            category = expected[1]
+            totals[category] = totals.get(category, 0) + 1
+            hits[category] = hits.get(category, 0) + found(text, expected, doc)
+
+    recall = " ".join(
+        f"{category}={hits[category] / totals[category]:.2f}"
+        for category in sorted(totals)
+    )
+    print(f"{name:>10}  {len(texts) / elapsed:9.0f} spans/s  {recall}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    import spacy
+
+    spans = make_spans(args.spans)
+    run("rules", None, spans, args.batch_size)
+
+    try:
+        run("sm (full)", spacy.load("en_core_web_sm"), spans, args.batch_size)
+    except OSError:
+        print(f"{'sm (full)':>10}  not installed")
+
+    for tier in models.spacy_packages:
+        try:
+            nlp = models.get(f"spacy-{tier}")
+        except (OSError, ImportError, ValueError):
+            print(f"{tier:>10}  not installed")
+            continue
+        run(tier, nlp, spans, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
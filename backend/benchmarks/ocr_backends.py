@@ -0,0 +1,78 @@
+"""Benchmark: OCR frames/sec of the tesserocr and pytesseract backends.
+
+Each available backend reads the same synthetic text frames on one thread and then
+on several, the way the video analyze stage calls it. Backends that are not
+installed are skipped.
+
+Run from the backend directory:
+
+    python -m benchmarks.ocr_backends --frames 32 --threads 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from services import ocr
+
+lines = [
+    "Invoice 4821 issued to Priya Sharma",
+    "Contact priya@example.com or +91 9876543210",
+    "Account 1234 5678 9012 due 12 March 2021",
+]
+
+
+def make_frames(count, width, height, seed=0):
+    """Builds deterministic frames with a few lines of text on a noisy background."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for index in range(count):
+        frame = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        for line_number, line in enumerate(lines):
+            origin = (40 + index % 20, 80 + line_number * 60)
+            cv2.putText(
+                frame, line, origin, cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2
+            )
+        frames.append(frame)
+    return frames
+
+
+def run(backend, frames, threads):
+    backend.image_to_data(frames[0])  # Warm up outside the timed run
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(backend.image_to_data, frames))
+    elapsed = time.perf_counter() - start
+    words = sum(len([text for text in result["text"] if text.strip()]) for result in results)
+    return len(frames) / elapsed, words / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.width, args.height)
+
+    for name in ocr.ocr_backends[1:]:
+        try:
+            backend = ocr.get_backend(name)
+        except Exception as error:  # Missing module, binary or language data
+            print(f"{name:>12}: unavailable ({error})")
+            continue
+        for threads in sorted({1, args.threads}):
+            fps, words = run(backend, frames, threads)
+            print(
+                f"{name:>12}, {threads} thread(s): {fps:6.1f} frames/s, "
+                f"{words:.1f} words/frame"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: per-page vs. per-word redaction application in document.redact_pdf.
+
+Run from the backend directory:
+
+    python -m benchmarks.redact_pdf --pages 200 --selections 3000
+"""
+
+import argparse
+import io
+import random
+import time
+
+import pymupdf
+
+from services import document
+
+
+def make_pdf(pages, seed=0):
+    """Builds a text-only PDF and returns its bytes and the bbox of every word."""
+    rng = random.Random(seed)
+    pdf_document = pymupdf.open()
+    words = []
+
+    for page_num in range(pages):
+        page = pdf_document.new_page()
+        for line in range(50):
+            y = 40 + line * 14
+            text = " ".join(f"word{rng.randint(0, 9999)}" for _ in range(8))
+            page.insert_text((40, y), text, fontsize=10)
+
+        for word in page.get_text("words"):
+            x0, y0, x1, y1 = word[:4]
+            words.append(
+                {
+                    "page": page_num,
+                    "pdfBbox": {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0},
+                }
+            )
+
+    output = io.BytesIO()
+    pdf_document.save(output)
+    pdf_document.close()
+    return output.getvalue(), words
+
+
+def redact_per_word(pdf_contents, words):
+    """The previous redact_pdf loop, applying redactions after every word."""
+    pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
+    for word in words:
+        rect = pymupdf.Rect(
+            word["pdfBbox"]["x"],
+            word["pdfBbox"]["y"],
+            word["pdfBbox"]["width"] + word["pdfBbox"]["x"],
+            word["pdfBbox"]["height"] + word["pdfBbox"]["y"],
+        )
+        page = pdf_document[word["page"]]
+        page.add_redact_annot(rect, fill=(0, 0, 0))
+        page.apply_redactions()
+
+    output = io.BytesIO()
+    pdf_document.save(output)
+    pdf_document.close()
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--selections", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pdf_contents, words = make_pdf(args.pages, args.seed)
+    selected = random.Random(args.seed).sample(words, min(args.selections, len(words)))
+    print(f"{args.pages} pages, {len(selected)} selected words")
+
+    runs = [
+        ("per-word apply", lambda: redact_per_word(pdf_contents, selected)),
+        (
+            "per-page apply",
+            lambda: document.redact_pdf(
+                io.BytesIO(pdf_contents), selected, garbage=0, deflate=False
+            ),
+        ),
+        (
+            "per-page + gc/deflate",
+            lambda: document.redact_pdf(io.BytesIO(pdf_contents), selected),
+        ),
+    ]
+    for name, run in runs:
+        start = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>22}: {elapsed:.2f}s  output {len(output) / 1024:,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
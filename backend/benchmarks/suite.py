@@ -0,0 +1,449 @@
+"""Benchmark suite: throughput, latency and peak memory of the service entry points.
+
+Each case runs the document, image or video service on deterministic synthetic
+inputs from benchmarks.corpora, in a fresh process so its peak RSS is its own, and
+reports items/sec, per-item latency percentiles and peak RSS (of the process and
+its children). Cases whose models, binaries or language data are missing are
+skipped.
+
+Results can be saved as a baseline and later runs compared against it; a case is
+flagged when its throughput drops, or its p95 latency or peak RSS grows, by more
+than --tolerance. The exit status is 1 if any case regressed.
+
+Run from the backend directory:
+
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import psutil
+
+from benchmarks import corpora
+
+
+class PeakRss:
+    """Samples the resident memory of this process and its children on a thread."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        process = psutil.Process()
+        while True:
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:  # Exited since it was listed
+                    pass
+            self.peak = max(self.peak, rss)
+            if self._stop.wait(self.interval):
+                return
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(unit, count, seconds, latencies, **extra):
+    latencies = sorted(latencies)
+    return {
+        "unit": unit,
+        "count": count,
+        "seconds": round(seconds, 3),
+        "per_second": round(count / seconds, 2),
+        "latency_p50": round(percentile(latencies, 0.5), 4),
+        "latency_p95": round(percentile(latencies, 0.95), 4),
+        "latency_max": round(latencies[-1], 4),
+        **extra,
+    }
+
+
+def recall(seeded, found_texts):
+    """Fraction of the seeded PII values that some redaction covers."""
+    found = " ".join(found_texts)
+    return round(sum(value in found for value in seeded) / len(seeded), 3)
+
+
+def require_ocrmypdf(args):
+    for binary in ("tesseract", "gs"):
+        if shutil.which(binary) is None:
+            raise RuntimeError(f"{binary} is not installed")
+
+
+def require_image_models(args):
+    from services import models, ocr
+
+    models.get("yolo-face")
+    models.get("spacy-sm")
+    ocr.get_backend(args.ocr_backend)
+
+
+def require_video_models(args):
+    from services import models, ocr
+
+    models.get("yolo-face")
+    ocr.get_backend(args.ocr_backend)
+
+
+def require_ner_model(args):
+    from services import models
+
+    if args.ner_model != "rules":
+        models.get(f"spacy-{args.ner_model}")
+
+
+def document_redact(args, directory):
+    """document.iter_redactions on a text PDF read by path; latency per page.
+
+    Latency and pages/sec come from a single-process run, since the process pool
+    hands pages back a chunk at a time; with --workers above 1 the pool's pages/sec
+    on the whole document is reported separately.
+    """
+    from services import document
+
+    pdf_bytes, seeded = corpora.make_text_pdf(args.pages, args.seed)
+    path = os.path.join(directory, "text.pdf")
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+    # Load the NER model outside the timed run
+    document.redact(corpora.make_text_pdf(1, args.seed)[0], ner_model=args.ner_model)
+
+    latencies = []
+    texts = []
+    start = last = time.perf_counter()
+    for _, redactions in document.iter_redactions(
+        path, "High", workers=1, ner_model=args.ner_model
+    ):
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        texts.extend(redaction["text"] for redaction in redactions)
+    result = summarize(
+        "pages",
+        args.pages,
+        time.perf_counter() - start,
+        latencies,
+        pii_recall=recall(seeded, texts),
+    )
+
+    if args.workers > 1:
+        start = time.perf_counter()
+        document.redact(
+            path,
+            "High",
+            workers=args.workers,
+            min_parallel_pages=1,
+            ner_model=args.ner_model,
+        )
+        result["parallel_per_second"] = round(
+            args.pages / (time.perf_counter() - start), 2
+        )
+    return result
+
+
+def document_redact_pdf(args, directory):
+    """document.redact_pdf blacking out every seeded PII value; latency per run."""
+    import pymupdf
+
+    from services import document
+
+    pdf_bytes, seeded = corpora.make_text_pdf(args.pages, args.seed)
+    path = os.path.join(directory, "text.pdf")
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+
+    # Select the words of the seeded values, as a user would in the frontend
+    seeded_words = set(" ".join(seeded).split())
+    words = []
+    with pymupdf.open(path) as pdf_document:
+        for page in pdf_document:
+            for x0, y0, x1, y1, text, *_ in page.get_text("words"):
+                if text.strip("()") in seeded_words:
+                    words.append(
+                        {
+                            "page": page.number,
+                            "pdfBbox": {
+                                "x": x0,
+                                "y": y0,
+                                "width": x1 - x0,
+                                "height": y1 - y0,
+                            },
+                        }
+                    )
+
+    latencies = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        document.redact_pdf(path, words)
+        latencies.append(time.perf_counter() - start)
+    return summarize(
+        "pages",
+        args.pages * args.repeat,
+        sum(latencies),
+        latencies,
+        selections=len(words),
+    )
+
+
+def document_ocr(args, directory):
+    """document.ocr on a scanned PDF read by path; latency per run."""
+    from services import document
+
+    pdf_bytes, _ = corpora.make_scanned_pdf(args.ocr_pages, args.seed)
+    path = os.path.join(directory, "scanned.pdf")
+    with open(path, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+
+    latencies = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        document.ocr(path, jobs=args.workers)
+        latencies.append(time.perf_counter() - start)
+    return summarize("pages", args.ocr_pages * args.repeat, sum(latencies), latencies)
+
+
+def image_redact(args, directory):
+    """image.detect_and_blur_faces_and_text one image at a time; latency per image."""
+    from services import image
+
+    images, _ = corpora.make_images(args.images, args.seed)
+    # Load the models outside the timed run
+    image.detect_and_blur_faces_and_text(
+        io.BytesIO(images[0]), ocr_backend=args.ocr_backend
+    )
+
+    latencies = []
+    for image_bytes in images:
+        start = time.perf_counter()
+        image.detect_and_blur_faces_and_text(
+            io.BytesIO(image_bytes), ocr_backend=args.ocr_backend
+        )
+        latencies.append(time.perf_counter() - start)
+    return summarize("images", len(images), sum(latencies), latencies)
+
+
+def image_batch(args, directory):
+    """image.iter_redact_images over the whole set; latency per image from its batch."""
+    from services import image
+
+    images, _ = corpora.make_images(args.images, args.seed)
+    # Load the models outside the timed run
+    image.detect_and_blur_faces_and_text(
+        io.BytesIO(images[0]), ocr_backend=args.ocr_backend
+    )
+
+    start = time.perf_counter()
+    latencies = [
+        seconds
+        for _, _, seconds in image.iter_redact_images(
+            [io.BytesIO(image_bytes) for image_bytes in images],
+            workers=args.workers,
+            ocr_backend=args.ocr_backend,
+        )
+    ]
+    return summarize("images", len(images), time.perf_counter() - start, latencies)
+
+
+def video_redact(args, directory):
+    """video.process_video_file on a short clip; latency between written frames."""
+    from services import video
+
+    input_path = os.path.join(directory, "input.mp4")
+    output_path = os.path.join(directory, "output.mp4")
+    corpora.make_video(input_path, args.frames, args.seed)
+    # Load the models outside the timed run
+    warm_up_path = os.path.join(directory, "warm_up.mp4")
+    corpora.make_video(warm_up_path, 2, args.seed)
+    video.process_video_file(warm_up_path, output_path, ocr_backend=args.ocr_backend)
+
+    written = []
+    start = time.perf_counter()
+    stats = video.process_video_file(
+        input_path,
+        output_path,
+        max_workers=args.workers,
+        ocr_backend=args.ocr_backend,
+        progress=lambda done, total: written.append(time.perf_counter()),
+    )
+    seconds = time.perf_counter() - start
+    latencies = [b - a for a, b in zip([start, *written], written)]
+    return summarize(
+        "frames",
+        len(written),
+        seconds,
+        latencies,
+        keyframes=stats["keyframes"],
+        stages=video.describe_stats(stats),
+    )
+
+
+# Case name -> (function, check raising if what it needs is missing)
+cases = {
+    "document-redact": (document_redact, require_ner_model),
+    "document-redact-pdf": (document_redact_pdf, None),
+    "document-ocr": (document_ocr, require_ocrmypdf),
+    "image-redact": (image_redact, require_image_models),
+    "image-batch": (image_batch, require_image_models),
+    "video-redact": (video_redact, require_video_models),
+}
+
+
+def run_case(name, args):
+    """Runs one case in this process, returning its metrics or why it was skipped."""
+    run, requirement = cases[name]
+    try:
+        if requirement is not None:
+            requirement(args)
+    except Exception as error:  # Missing model, module or binary
+        return {"skipped": str(error)}
+
+    with tempfile.TemporaryDirectory() as directory, PeakRss() as rss:
+        result = run(args, directory)
+    result["peak_rss_mb"] = round(rss.peak / 2**20, 1)
+    return result
+
+
+def compare(result, baseline, tolerance):
+    """Lines describing how result moved against its baseline, and if it regressed."""
+    notes = []
+    regressed = False
+    checks = [
+        ("per_second", -1),  # Lower is worse
+        ("parallel_per_second", -1),
+        ("latency_p95", 1),
+        ("peak_rss_mb", 1),
+    ]
+    for metric, worse in checks:
+        before, after = baseline.get(metric), result.get(metric)
+        if not before or after is None:
+            continue
+        change = after / before - 1
+        flag = change * worse > tolerance
+        regressed |= flag
+        notes.append(f"{metric} {change:+.0%}{' REGRESSED' if flag else ''}")
+    return notes, regressed
+
+
+def machine():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def settings(args):
+    """The arguments that change what is measured."""
+    return {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("cases", "baseline", "save_baseline", "tolerance")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=list(cases), default=list(cases))
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--ocr-pages", type=int, default=4)
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ner-model", default="sm")
+    parser.add_argument("--ocr-backend", default="auto")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("machine") != machine():
+            print(f"note: baseline was recorded on {baseline.get('machine')}")
+        if baseline.get("settings") != settings(args):
+            print(f"note: baseline was recorded with {baseline.get('settings')}")
+
+    results = {}
+    regressions = []
+    # A fresh process per case keeps models loaded by one out of the next's RSS
+    context = multiprocessing.get_context("spawn")
+    for name in args.cases:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            result = executor.submit(run_case, name, args).result()
+        results[name] = result
+
+        if "skipped" in result:
+            print(f"{name:>20}: skipped ({result['skipped']})")
+            continue
+        line = (
+            f"{name:>20}: {result['per_second']:8.2f} {result['unit']}/s | "
+            f"p50 {result['latency_p50'] * 1000:8.1f}ms "
+            f"p95 {result['latency_p95'] * 1000:8.1f}ms "
+            f"max {result['latency_max'] * 1000:8.1f}ms | "
+            f"peak RSS {result['peak_rss_mb']:7.1f} MiB"
+        )
+        if "pii_recall" in result:
+            line += f" | PII recall {result['pii_recall']:.0%}"
+        if "parallel_per_second" in result:
+            line += (
+                f" | {args.workers} workers "
+                f"{result['parallel_per_second']:.2f} {result['unit']}/s"
+            )
+        print(line)
+        if "stages" in result:
+            print(f"{'':>20}  stages: {result['stages']}")
+
+        before = baseline.get("cases", {}).get(name)
+        if before and "skipped" not in before:
+            notes, regressed = compare(result, before, args.tolerance)
+            print(f"{'':>20}  vs baseline: {', '.join(notes)}")
+            if regressed:
+                regressions.append(name)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(
+                {"machine": machine(), "settings": settings(args), "cases": results},
+                baseline_file,
+                indent=2,
+            )
+            baseline_file.write("\n")
+
+    if regressions:
+        print(f"regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark: whole-image OCR vs. OCR of proposed text regions only.
+
+Three synthetic scenes: a heavily textured photo with an ID card in it, a smooth
+photo with a card and a caption, and a page of text. Words are counted at the
+confidence threshold the image service uses.
+
+Run from the backend directory:
+
+    python -m benchmarks.text_proposals --workers 4
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from services import ocr
+from services.regions import propose_text_regions
+
+card_lines = ["Name: Priya Sharma", "DOB: 12/03/1990", "1234 5678 9012"]
+
+
+def draw_card(image, x, y, scale):
+    corner = (x + int(600 * scale), y + int(350 * scale))
+    cv2.rectangle(image, (x, y), corner, (235, 235, 235), -1)
+    for line_number, line in enumerate(card_lines):
+        origin = (x + int(25 * scale), y + int((60 + line_number * 75) * scale))
+        cv2.putText(
+            image, line, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), 2
+        )
+
+
+def textured_photo(width=4000, height=3000, seed=1):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    draw_card(image, int(width * 0.6), int(height * 0.65), 2)
+    return image
+
+
+def smooth_photo(width=3000, height=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    image = np.stack(
+        [xx / width * 200, yy / height * 180, (xx + yy) / (width + height) * 150], -1
+    ).astype(np.uint8)
+    for _ in range(40):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(image, center, int(rng.integers(30, 200)), color, -1)
+    image = cv2.GaussianBlur(image, (31, 31), 0)
+    draw_card(image, int(width * 0.6), int(height * 0.6), 1.4)
+    return image
+
+
+def text_page(width=1275, height=1650):
+    image = np.full((height, width, 3), 250, dtype=np.uint8)
+    for line_number in range(30):
+        cv2.putText(
+            image,
+            "The agreement between Priya Sharma and Infosys 98765",
+            (60, 60 + line_number * 50),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.9,
+            (10, 10, 10),
+            2,
+        )
+    return image
+
+
+def confident_words(text_data):
+    return [
+        word
+        for word, confidence in zip(text_data["text"], text_data["conf"])
+        if word.strip() and int(confidence) > 60
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="auto", choices=ocr.ocr_backends)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    backend = ocr.get_backend(args.backend)
+    # Start the OCR threads (and their engines) outside the timed runs
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    ocr.regions_to_data(
+        blank, [(0, 0, 32, 32)] * args.workers, args.backend, workers=args.workers
+    )
+
+    scenes = [
+        ("textured photo", textured_photo()),
+        ("smooth photo", smooth_photo()),
+        ("text page", text_page()),
+    ]
+    for name, image in scenes:
+        start = time.perf_counter()
+        whole = confident_words(backend.image_to_data(image))
+        whole_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        regions = propose_text_regions(image)
+        cropped = confident_words(
+            ocr.regions_to_data(image, regions, args.backend, workers=args.workers)
+        )
+        cropped_seconds = time.perf_counter() - start
+
+        covered = sum(w * h for _, _, w, h in regions)
+        coverage = covered / (image.shape[0] * image.shape[1])
+        print(
+            f"{name:>14}: whole {whole_seconds:6.2f}s {len(whole):4d} words | "
+            f"{len(regions):3d} regions ({coverage:5.1%} of image) "
+            f"{cropped_seconds:6.2f}s {len(cropped):4d} words"
+        )
+
+
+if __name__ == "__main__":
+    main()
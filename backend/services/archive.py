@@ -0,0 +1,97 @@
+import io
+import os
+
+import pyzipper
+
+# Formats that are already compressed; deflating them again only costs CPU
+stored_extensions = {
+    ".7z",
+    ".avi",
+    ".docx",
+    ".gif",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".m4a",
+    ".mkv",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".png",
+    ".pptx",
+    ".webm",
+    ".webp",
+    ".xlsx",
+    ".zip",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what is written until taken."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compress_type(name, compression_level):
+    """The zip method for an entry: stored for level 0 or compressed media."""
+    if compression_level == 0:
+        return pyzipper.ZIP_STORED
+    if os.path.splitext(name)[1].lower() in stored_extensions:
+        return pyzipper.ZIP_STORED
+    return pyzipper.ZIP_DEFLATED
+
+
+def iter_zip(entries, password="", compression_level=5, chunk_size=1024 * 1024):
+    """Builds a zip of (name, file object) entries, yielding it in pieces.
+
+    Each file is copied chunk_size bytes at a time and the archive is handed out
+    as it is produced, so memory use does not grow with the size of the files.
+    Entries are AES-encrypted when a password is given.
+    """
+    sink = _ChunkSink()
+    # The output cannot seek, so sizes and CRCs go in data descriptors after each
+    # entry, which every unzip tool reads
+    # pyzipper refuses to write entries for WZ_AES without a password
+    encryption = pyzipper.WZ_AES if password else None
+    with pyzipper.AESZipFile(
+        sink, "w", compression=pyzipper.ZIP_DEFLATED, encryption=encryption
+    ) as zip_file:
+        if password:
+            zip_file.setpassword(password.encode("utf-8"))
+
+        for name, file in entries:
+            info = zip_file.zipinfo_cls(name)
+            info.compress_type = compress_type(name, compression_level)
+            info._compresslevel = compression_level
+            # Lets the writer pick ZIP64 for large files up front
+            file.seek(0, os.SEEK_END)
+            info.file_size = file.tell()
+            file.seek(0)
+
+            with zip_file.open(info, "w") as entry:
+                while chunk := file.read(chunk_size):
+                    entry.write(chunk)
+                    yield from _pieces(sink)
+            yield from _pieces(sink)
+
+    # The central directory, written on close
+    yield from _pieces(sink)
+
+
+def _pieces(sink):
+    data = sink.take()
+    if data:
+        yield data
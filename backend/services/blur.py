@@ -0,0 +1,58 @@
+import cv2
+
+# Obfuscation modes for blur_area. All of them destroy at least as much detail as
+# the original 301x301 Gaussian blur at the default blur_level.
+blur_modes = ["pixelate", "box", "fill", "gaussian"]
+
+default_blur_mode = "pixelate"
+
+
+def blur_area(image, x, y, w, h, blur_level=300, mode=default_blur_mode):
+    """Obfuscates a specific area of the image in place.
+
+    blur_level is the kernel size of the equivalent Gaussian blur; the other modes
+    scale their strength from it.
+    """
+    # Clip the area to the image
+    x1, y1 = max(int(x), 0), max(int(y), 0)
+    x2 = min(int(x + w), image.shape[1])
+    y2 = min(int(y + h), image.shape[0])
+    if x2 <= x1 or y2 <= y1:
+        return image
+
+    ROI = image[y1:y2, x1:x2]
+
+    if mode == "pixelate":
+        # A Gaussian with kernel blur_level spreads each pixel over roughly a
+        # quarter of the kernel, so average over cells of that size
+        cell = max(blur_level // 4, 1)
+        small = cv2.resize(
+            ROI,
+            (max(ROI.shape[1] // cell, 1), max(ROI.shape[0] // cell, 1)),
+            interpolation=cv2.INTER_AREA,
+        )
+        ROI[:] = cv2.resize(
+            small, (ROI.shape[1], ROI.shape[0]), interpolation=cv2.INTER_NEAREST
+        )
+    elif mode == "box":
+        # Box filter cost does not depend on the kernel size
+        ROI[:] = cv2.blur(ROI, (blur_level, blur_level))
+    elif mode == "fill":
+        ROI[:] = 0
+    elif mode == "gaussian":
+        # Blur a downscaled copy with a proportionally smaller kernel
+        scale = max(blur_level // 30, 1)
+        small = cv2.resize(
+            ROI,
+            (max(ROI.shape[1] // scale, 1), max(ROI.shape[0] // scale, 1)),
+            interpolation=cv2.INTER_AREA,
+        )
+        kernel = max(blur_level // scale, 1) | 1  # Must be odd
+        small = cv2.GaussianBlur(small, (kernel, kernel), 0)
+        ROI[:] = cv2.resize(
+            small, (ROI.shape[1], ROI.shape[0]), interpolation=cv2.INTER_LINEAR
+        )
+    else:
+        raise ValueError(f"Unknown blur mode: {mode}")
+
+    return image
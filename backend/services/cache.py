@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Content-addressed cache of operation results.
+
+    Results are kept pickled in an in-memory LRU tier bounded by entry count and
+    total size, and optionally in an on-disk tier under `directory` bounded by
+    `max_disk_bytes`, evicting least recently used files first.
+    """
+
+    def __init__(
+        self,
+        max_entries=128,
+        max_memory_bytes=256 * 1024 * 1024,
+        directory=None,
+        max_disk_bytes=1024 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> pickled value, oldest first
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> file size, oldest first
+        self._disk_bytes = 0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(data, operation, **params):
+        """Hashes the input together with the operation and its parameters.
+
+        data is the input's bytes or the path of a file holding them, which is read
+        in chunks.
+        """
+        digest = hashlib.sha256()
+        digest.update(operation.encode("utf-8"))
+        digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        if isinstance(data, (str, os.PathLike)):
+            with open(data, "rb") as input_file:
+                while chunk := input_file.read(1024 * 1024):
+                    digest.update(chunk)
+        else:
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached result for `key`, or None on a miss."""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return pickle.loads(payload)
+
+            if key in self._disk:
+                try:
+                    with open(self._path(key), "rb") as cache_file:
+                        payload = cache_file.read()
+                    os.utime(self._path(key))  # Keeps LRU order across restarts
+                except OSError:
+                    self._forget_disk(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, payload)
+                    return pickle.loads(payload)
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Stores `value` under `key` in every enabled tier."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, payload)
+            if self.directory is not None:
+                self._write_disk(key, payload)
+
+    def stats(self):
+        """Returns hit/miss counters and current tier sizes."""
+        with self._lock:
+            lookups = (
+                self._stats["memory_hits"]
+                + self._stats["disk_hits"]
+                + self._stats["misses"]
+            )
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key, payload):
+        if self.max_entries <= 0 or len(payload) > self.max_memory_bytes:
+            return
+
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+
+        while (
+            len(self._memory) > self.max_entries
+            or self._memory_bytes > self.max_memory_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats["memory_evictions"] += 1
+
+    def _write_disk(self, key, payload):
+        if len(payload) > self.max_disk_bytes:
+            return
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(payload)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        self._forget_disk(key, remove=False)
+        self._disk[key] = len(payload)
+        self._disk_bytes += len(payload)
+
+        while self._disk_bytes > self.max_disk_bytes:
+            evicted = next(iter(self._disk))
+            self._forget_disk(evicted)
+            self._stats["disk_evictions"] += 1
+
+    def _forget_disk(self, key, remove=True):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+        if remove:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # Left over from an interrupted write
+            elif name.endswith(".pkl"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[: -len(".pkl")], stat.st_size))
+
+        # Oldest first, so the least recently used entries are evicted first
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+
+class ChangeDetector:
+    """Cheap frame change detection on a grid of blocks.
+
+    `signature(frame)` is computed once per frame; `compare(sig1, sig2)` returns the
+    fraction of unchanged blocks (1.0 means identical) and the changed blocks as
+    (x, y, w, h) regions in frame coordinates, merged along each grid row.
+    """
+
+    def __init__(self, grid=(16, 9), cell=8):
+        self.grid = grid  # Blocks across, blocks down
+        self.cell = cell  # Side of a block after downsampling
+
+    def signature(self, frame):
+        height, width = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(
+            gray,
+            (self.grid[0] * self.cell, self.grid[1] * self.cell),
+            interpolation=cv2.INTER_AREA,
+        )
+        return (width, height), self._block_signature(self._blocks(small))
+
+    def compare(self, sig1, sig2):
+        (width, height), blocks1 = sig1
+        _, blocks2 = sig2
+        changed = self._changed(blocks1, blocks2)
+        similarity = 1.0 - changed.mean()
+        return similarity, self._regions(changed, width, height)
+
+    def _blocks(self, small):
+        """Splits the downsampled frame into a (rows, cols, cell, cell) array."""
+        cols, rows = self.grid
+        return small.reshape(rows, self.cell, cols, self.cell).swapaxes(1, 2)
+
+    def _regions(self, changed, width, height):
+        block_width = width / self.grid[0]
+        block_height = height / self.grid[1]
+
+        regions = []
+        for row in range(changed.shape[0]):
+            col = 0
+            while col < changed.shape[1]:
+                if not changed[row, col]:
+                    col += 1
+                    continue
+                start = col
+                while col < changed.shape[1] and changed[row, col]:
+                    col += 1
+                x1, x2 = int(start * block_width), int(col * block_width)
+                y1, y2 = int(row * block_height), int((row + 1) * block_height)
+                regions.append((x1, y1, x2 - x1, y2 - y1))
+        return regions
+
+    def _block_signature(self, blocks):
+        raise NotImplementedError
+
+    def _changed(self, blocks1, blocks2):
+        raise NotImplementedError
+
+
+class DiffChangeDetector(ChangeDetector):
+    """Mean absolute difference of each downsampled block."""
+
+    def __init__(self, grid=(16, 9), cell=8, threshold=12.0):
+        super().__init__(grid, cell)
+        self.threshold = threshold
+
+    def _block_signature(self, blocks):
+        return blocks.astype(np.int16)
+
+    def _changed(self, blocks1, blocks2):
+        return np.abs(blocks1 - blocks2).mean(axis=(2, 3)) > self.threshold
+
+
+class HashChangeDetector(ChangeDetector):
+    """Difference hash of each block, compared by Hamming distance."""
+
+    def __init__(self, grid=(16, 9), cell=8, max_distance=10):
+        super().__init__(grid, cell)
+        self.max_distance = max_distance
+
+    def _block_signature(self, blocks):
+        # Each bit says whether a pixel is brighter than its right-hand neighbour
+        return blocks[:, :, :, 1:] > blocks[:, :, :, :-1]
+
+    def _changed(self, blocks1, blocks2):
+        return (blocks1 != blocks2).sum(axis=(2, 3)) > self.max_distance
+
+
+class HistogramChangeDetector(ChangeDetector):
+    """Intensity histogram of each block, compared by total variation distance."""
+
+    def __init__(self, grid=(16, 9), cell=16, bins=16, threshold=0.25):
+        super().__init__(grid, cell)
+        self.bins = bins
+        self.threshold = threshold
+
+    def _block_signature(self, blocks):
+        rows, cols = blocks.shape[:2]
+        bucket = (blocks.reshape(rows, cols, -1).astype(np.int32) * self.bins) // 256
+        histograms = np.zeros((rows, cols, self.bins), dtype=np.float32)
+        for value in range(self.bins):
+            histograms[:, :, value] = (bucket == value).mean(axis=2)
+        return histograms
+
+    def _changed(self, blocks1, blocks2):
+        return np.abs(blocks1 - blocks2).sum(axis=2) / 2 > self.threshold
+
+
+change_detectors = {
+    "diff": DiffChangeDetector,
+    "hash": HashChangeDetector,
+    "histogram": HistogramChangeDetector,
+}
+
+
+def get_change_detector(name="diff", **kwargs):
+    """Builds one of the registered change detectors by name."""
+    if name not in change_detectors:
+        raise ValueError(f"Unknown change detector: {name}")
+    return change_detectors[name](**kwargs)
+
+
+def bounding_area(regions, width, height, padding=0):
+    """Bounding box of all regions grown by padding, or None if there are none."""
+    if not regions:
+        return None
+    x1 = max(min(x for x, _, _, _ in regions) - padding, 0)
+    y1 = max(min(y for _, y, _, _ in regions) - padding, 0)
+    x2 = min(max(x + w for x, _, w, _ in regions) + padding, width)
+    y2 = min(max(y + h for _, y, _, h in regions) + padding, height)
+    return x1, y1, x2 - x1, y2 - y1
@@ -1,26 +1,14 @@
-import base64
 import io
-import re
+import mmap
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
 
 import ocrmypdf
 import pymupdf
-import spacy
-
-nlp = spacy.load("en_core_web_sm")
-
-# Define regex patterns for custom categories
-email_pattern = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b")
-phone_pattern = re.compile(r"(?:\+91|91)?\s*-*\s*[6-9]\d{9}")
-aadhaar_pattern = re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}\b")
-pan_pattern = re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b")
-ip_pattern = re.compile(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b")
-ssn_pattern = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-credit_card_pattern = re.compile(r"\b(?:\d{4}[-.\s]?){3}\d{4}\b")
-links_pattern = re.compile(r"https?://[^\s]+")
-alphanumeric_pattern = re.compile(
-    r"^(?!.*\b(?:\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})\b)(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d]{2,}$"
-)
-
+from services import models, ocr_progress, pii
 
 # Custom categories for redaction
 custom_categories = { 
@@ -63,361 +51,564 @@ levels = {
 }
 
 
-def redact(pdf_file, level="High"):
-    if level == "Low":
-        return low_redact(pdf_file)
-    elif level == "Medium":
-        return medium_redact(pdf_file)
-    elif level == "High":
-        return high_redact(pdf_file)
-
+# PII scanner groups checked for each level
+level_pii_groups = {
+    "Low": ("email", "phone", "aadhaar", "pan"),
+    "Medium": ("email", "phone", "aadhaar", "pan", "credit_card"),
+    "High": pii.all_groups,
+}
 
-def low_redact(pdf_file):
-    pdf_contents = pdf_file.read()
+# NER tiers: "rules" skips spaCy and only runs the PII scanner, the others name a
+# spaCy pipeline in models.spacy_packages
+ner_models = ["rules", *models.spacy_packages]
+
+# NER tier used for each level unless the caller picks one
+level_ner_models = {"Low": "sm", "Medium": "sm", "High": "sm"}
+
+
+def redact(
+    pdf_file,
+    level="High",
+    batch_size=256,
+    n_process=1,
+    workers=1,
+    chunk_size=16,
+    min_parallel_pages=64,
+    ner_model=None,
+):
+    """Detects redactable entities in every text span of the PDF."""
+    if level not in levels:
+        return None
 
-    pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
     redactions = []
+    for _, page_redactions in iter_redactions(
+        pdf_file,
+        level,
+        batch_size,
+        n_process,
+        workers,
+        chunk_size,
+        min_parallel_pages,
+        ner_model,
+    ):
+        redactions.extend(page_redactions)
+    return redactions
 
-    for page_num, page in enumerate(pdf_document):
-        page_text = page.get_text("dict")
-        page_words = page_text["blocks"]
 
-        for block in page_words:
-            if block["type"] == 0:  # Text block
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        # Get the bounding box and text
-                        span_bbox = span["bbox"]
-                        span_text = span["text"]
-
-                        # Process text with spaCy
-                        doc = nlp(span_text)
-                        entities_to_redact = []
-
-                        for entity in doc.ents:
-                            for category in levels["Low"]:
-                                if entity.label_ in custom_categories[category]:
-                                    entities_to_redact.append(
-                                        {"text": entity.text, "category": category}
-                                    )
-
-                        # Add regex-based redactions for emails, phone numbers, etc.
-                        if re.findall(email_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Emails"}
-                            )
-                        elif re.findall(phone_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Phone Numbers"}
-                            )
-                        elif re.findall(aadhaar_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Aadhaar Number"}
-                            )
-                        elif re.findall(pan_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "PAN Number"}
-                            )
-
-                        # Add redaction details with category
-                        for entity in entities_to_redact:
-                            if entity["text"].strip():
-                                # Find the index of the word in the span text
-                                word_start = span_text.find(entity["text"])
-                                word_end = word_start + len(entity["text"])
-
-                                # Calculate the proportion of the word within the span
-                                span_length = len(span_text)
-                                word_bbox_x1 = span_bbox[0] + (
-                                    word_start / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_x2 = span_bbox[0] + (
-                                    word_end / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_y1 = span_bbox[1]
-                                word_bbox_y2 = span_bbox[3]
-
-                                # Append the redaction with category
-                                redactions.append(
-                                    {
-                                        "page": page_num,
-                                        "text": entity["text"],
-                                        "category": entity["category"],
-                                        "bbox": {
-                                            "x": word_bbox_x1,
-                                            "y": word_bbox_y1,
-                                            "width": word_bbox_x2 - word_bbox_x1,
-                                            "height": word_bbox_y2 - word_bbox_y1,
-                                        },
-                                    }
-                                )
-    return redactions
+def iter_redactions(
+    pdf_file,
+    level="High",
+    batch_size=256,
+    n_process=1,
+    workers=1,
+    chunk_size=16,
+    min_parallel_pages=64,
+    ner_model=None,
+):
+    """Yields (page_num, redactions) for every page, in order, as each is processed.
+
+    pdf_file is a path, a bytes-like buffer or a file object (see pdf_source).
+    Documents with at least `min_parallel_pages` pages are sharded into chunks of
+    `chunk_size` pages across `workers` processes when `workers` is above 1.
+    """
+    ner_model = check_level(level, ner_model)
+
+    source = pdf_source(pdf_file)
+    pdf_document = open_pdf(source)
+    try:
+        yield from iter_document_redactions(
+            pdf_document,
+            source,
+            level,
+            batch_size,
+            n_process,
+            workers,
+            chunk_size,
+            min_parallel_pages,
+            ner_model,
+        )
+    finally:
+        pdf_document.close()
+
+
+def pdf_source(pdf_file):
+    """What open_pdf takes for pdf_file: paths and buffers as they are.
+
+    A path or memory-mapped file lets PyMuPDF read the document straight from
+    disk; file objects are read into memory.
+    """
+    if isinstance(pdf_file, mmap.mmap):
+        return memoryview(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike, bytes, bytearray, memoryview)):
+        return pdf_file
+    return pdf_file.read()
+
+
+def open_pdf(source):
+    """Opens a PDF from a path or a bytes-like buffer."""
+    if isinstance(source, (str, os.PathLike)):
+        return pymupdf.open(source, filetype="pdf")
+    return pymupdf.open(stream=source, filetype="pdf")
+
+
+def pdf_bytes_of(source):
+    """The bytes of a PDF given as a path or a bytes-like buffer."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as pdf_file:
+            return pdf_file.read()
+    return bytes(source)
+
+
+def check_level(level, ner_model=None):
+    """Validates a redaction level and NER tier, returning the tier to use."""
+    if level not in levels:
+        raise ValueError(f"Unknown redaction level: {level}")
+    if ner_model is None:
+        ner_model = level_ner_models[level]
+    if ner_model not in ner_models:
+        raise ValueError(f"Unknown NER model: {ner_model}")
+    return ner_model
+
+
+def iter_document_redactions(
+    pdf_document,
+    source,
+    level,
+    batch_size=256,
+    n_process=1,
+    workers=1,
+    chunk_size=16,
+    min_parallel_pages=64,
+    ner_model="sm",
+):
+    """Like iter_redactions, for a PDF that is already open.
+
+    source must be the document's path or bytes; worker processes open their own
+    copy from it.
+    """
+    page_count = len(pdf_document)
+
+    if workers > 1 and page_count >= min_parallel_pages:
+        yield from parallel_page_redactions(
+            source, page_count, level, batch_size, workers, chunk_size, ner_model
+        )
+        return
+
+    yield from iter_page_redactions(
+        pdf_document, range(page_count), level, batch_size, n_process, ner_model
+    )
+
+
+def iter_page_redactions(
+    pdf_document, pages, level, batch_size=256, n_process=1, ner_model="sm"
+):
+    """Yields (page_num, redactions) for each of the given pages of an open PDF."""
+    pages = list(pages)
+    entities = detect_entities(
+        pdf_document,
+        pages,
+        batch_size=batch_size,
+        n_process=n_process,
+        ner_model=ner_model,
+    )
+    # Docs come out of nlp.pipe in span order, so they can be grouped per page as
+    # they stream; pages without text spans simply have no group
+    page_groups = groupby(entities, key=lambda item: item[1][0])
+    group = next(page_groups, None)
+
+    for page_num in pages:
+        redactions = []
+        if group is not None and group[0] == page_num:
+            for doc, (_, span_text, span_bbox) in group[1]:
+                redactions.extend(
+                    span_redactions(doc, page_num, span_text, span_bbox, level)
+                )
+            group = next(page_groups, None)
+        yield page_num, redactions
+
+
+def parallel_page_redactions(
+    source, page_count, level, batch_size, workers, chunk_size, ner_model="sm"
+):
+    """Shards page ranges across a process pool, yielding page results in order."""
+    chunks = [
+        (start, min(start + chunk_size, page_count), level, batch_size, ner_model)
+        for start in range(0, page_count, chunk_size)
+    ]
+
+    # Workers given a path read the file themselves; buffers are pickled to them
+    worker_source = source
+    if not isinstance(source, (str, os.PathLike)):
+        worker_source = bytes(source)
+
+    # Load the pipeline before forking so every worker inherits it instead of
+    # loading its own copy for each request
+    if ner_model != "rules":
+        models.get(f"spacy-{ner_model}")
+
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=_fork_context(),
+        initializer=_init_worker,
+        initargs=(worker_source,),
+    )
+    try:
+        # map yields chunk results in submission order, i.e. page order
+        for chunk_redactions in executor.map(_redact_chunk, chunks):
+            yield from chunk_redactions
+    finally:
+        # Don't keep working on a document nobody is waiting for anymore
+        executor.shutdown(cancel_futures=True)
 
 
-def high_redact(pdf_file):
-    pdf_contents = pdf_file.read()
+def _fork_context():
+    """Fork start method where the platform has it, else the default one.
 
-    pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
-    redactions = []
+    It is asked for explicitly since the default is forkserver from Python 3.14,
+    which would start every worker without the parent's loaded pipeline.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
 
-    for page_num, page in enumerate(pdf_document):
-        page_text = page.get_text("dict")
-        page_words = page_text["blocks"]
 
-        for block in page_words:
-            if block["type"] == 0:  # Text block
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        # Get the bounding box and text
-                        span_bbox = span["bbox"]
-                        span_text = span["text"]
-
-                        # Process text with spaCy
-                        doc = nlp(span_text)
-                        entities_to_redact = []
-
-                        for entity in doc.ents:
-                            for category in levels["High"]:
-                                if entity.label_ in custom_categories[category]:
-                                    entities_to_redact.append(
-                                        {"text": entity.text, "category": category}
-                                    )
-
-                        # Add regex-based redactions for emails, phone numbers, etc.
-                        if re.findall(email_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Emails"}
-                            )
-                        elif re.findall(phone_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Phone Numbers"}
-                            )
-                        elif re.findall(aadhaar_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Aadhaar Number"}
-                            )
-                        elif re.findall(pan_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "PAN Number"}
-                            )
-                        elif re.findall(ip_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "IP Address"}
-                            )
-                        elif re.findall(ssn_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "SSN"}
-                            )
-                        elif re.findall(credit_card_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Credit or Debit Card"}
-                            )
-                        elif re.findall(links_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Links"}
-                            )
-                        elif re.findall(alphanumeric_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Credentials"}
-                            )
-
-                        # Add redaction details with category
-                        for entity in entities_to_redact:
-                            if entity["text"].strip():
-                                # Find the index of the word in the span text
-                                word_start = span_text.find(entity["text"])
-                                word_end = word_start + len(entity["text"])
-
-                                # Calculate the proportion of the word within the span
-                                span_length = len(span_text)
-                                word_bbox_x1 = span_bbox[0] + (
-                                    word_start / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_x2 = span_bbox[0] + (
-                                    word_end / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_y1 = span_bbox[1]
-                                word_bbox_y2 = span_bbox[3]
-
-                                # Append the redaction with category
-                                redactions.append(
-                                    {
-                                        "page": page_num,
-                                        "text": entity["text"],
-                                        "category": entity["category"],
-                                        "bbox": {
-                                            "x": word_bbox_x1,
-                                            "y": word_bbox_y1,
-                                            "width": word_bbox_x2 - word_bbox_x1,
-                                            "height": word_bbox_y2 - word_bbox_y1,
-                                        },
-                                    }
-                                )
-    return redactions
+# PDF opened once per worker process by _init_worker
+_worker_document = None
 
 
-def medium_redact(pdf_file):
-    pdf_contents = pdf_file.read()
+def _init_worker(source):
+    global _worker_document
+    _worker_document = open_pdf(source)
 
-    pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
-    redactions = []
 
-    for page_num, page in enumerate(pdf_document):
-        page_text = page.get_text("dict")
-        page_words = page_text["blocks"]
+def _redact_chunk(chunk):
+    start, stop, level, batch_size, ner_model = chunk
+    return list(
+        iter_page_redactions(
+            _worker_document,
+            range(start, stop),
+            level,
+            batch_size,
+            ner_model=ner_model,
+        )
+    )
+
+
+def iter_spans(pdf_document, pages=None):
+    """Yields (text, (page_num, text, bbox)) for every text span of the given pages."""
+    if pages is None:
+        pages = range(len(pdf_document))
+
+    for page_num in pages:
+        page_text = pdf_document[page_num].get_text("dict")
 
-        for block in page_words:
+        for block in page_text["blocks"]:
             if block["type"] == 0:  # Text block
                 for line in block["lines"]:
                     for span in line["spans"]:
-                        # Get the bounding box and text
-                        span_bbox = span["bbox"]
-                        span_text = span["text"]
-
-                        # Process text with spaCy
-                        doc = nlp(span_text)
-                        entities_to_redact = []
-
-                        for entity in doc.ents:
-                            for category in levels["Medium"]:
-                                if entity.label_ in custom_categories[category]:
-                                    entities_to_redact.append(
-                                        {"text": entity.text, "category": category}
-                                    )
-
-                        # Add regex-based redactions for emails, phone numbers, etc.
-                        if re.findall(email_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Emails"}
-                            )
-                        elif re.findall(phone_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Phone Numbers"}
-                            )
-                        elif re.findall(aadhaar_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Aadhaar Number"}
-                            )
-                        elif re.findall(pan_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "PAN Number"}
-                            )
-                        elif re.findall(credit_card_pattern, span_text):
-                            entities_to_redact.append(
-                                {"text": span_text, "category": "Credit or Debit Card"}
-                            )
-
-                        # Add redaction details with category
-                        for entity in entities_to_redact:
-                            if entity["text"].strip():
-                                # Find the index of the word in the span text
-                                word_start = span_text.find(entity["text"])
-                                word_end = word_start + len(entity["text"])
-
-                                # Calculate the proportion of the word within the span
-                                span_length = len(span_text)
-                                word_bbox_x1 = span_bbox[0] + (
-                                    word_start / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_x2 = span_bbox[0] + (
-                                    word_end / span_length
-                                ) * (span_bbox[2] - span_bbox[0])
-                                word_bbox_y1 = span_bbox[1]
-                                word_bbox_y2 = span_bbox[3]
-
-                                # Append the redaction with category
-                                redactions.append(
-                                    {
-                                        "page": page_num,
-                                        "text": entity["text"],
-                                        "category": entity["category"],
-                                        "bbox": {
-                                            "x": word_bbox_x1,
-                                            "y": word_bbox_y1,
-                                            "width": word_bbox_x2 - word_bbox_x1,
-                                            "height": word_bbox_y2 - word_bbox_y1,
-                                        },
-                                    }
-                                )
+                        yield span["text"], (page_num, span["text"], span["bbox"])
+
+
+def detect_entities(
+    pdf_document, pages=None, batch_size=256, n_process=1, ner_model="sm"
+):
+    """Runs spaCy over all spans in batches, yielding (doc, (page_num, text, bbox)).
+
+    With the "rules" tier no pipeline runs and every doc is None.
+    """
+    if ner_model == "rules":
+        return ((None, context) for _, context in iter_spans(pdf_document, pages))
+
+    # nlp.pipe keeps the span context attached to each doc, so the entities can be
+    # mapped back to their page and bbox without one pipeline call per span
+    return models.get(f"spacy-{ner_model}").pipe(
+        iter_spans(pdf_document, pages),
+        as_tuples=True,
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+
+
+def span_redactions(doc, page_num, span_text, span_bbox, level):
+    """Builds the redaction entries for a single span."""
+    entities_to_redact = []
+
+    for entity in doc.ents if doc is not None else ():
+        for category in levels[level]:
+            if entity.label_ in custom_categories[category]:
+                entities_to_redact.append(
+                    (entity.text, entity.start_char, category)
+                )
+
+    # Add regex-based redactions for emails, phone numbers, etc.
+    for start, end, category in pii.scan(span_text, level_pii_groups[level]):
+        entities_to_redact.append((span_text[start:end], start, category))
+
+    # Add redaction details with category
+    redactions = []
+    for entity_text, word_start, category in entities_to_redact:
+        if entity_text.strip():
+            word_end = word_start + len(entity_text)
+
+            # Calculate the proportion of the word within the span
+            span_length = len(span_text)
+            word_bbox_x1 = span_bbox[0] + (word_start / span_length) * (
+                span_bbox[2] - span_bbox[0]
+            )
+            word_bbox_x2 = span_bbox[0] + (word_end / span_length) * (
+                span_bbox[2] - span_bbox[0]
+            )
+            word_bbox_y1 = span_bbox[1]
+            word_bbox_y2 = span_bbox[3]
+
+            # Append the redaction with category
+            redactions.append(
+                {
+                    "page": page_num,
+                    "text": entity_text,
+                    "category": category,
+                    "bbox": {
+                        "x": word_bbox_x1,
+                        "y": word_bbox_y1,
+                        "width": word_bbox_x2 - word_bbox_x1,
+                        "height": word_bbox_y2 - word_bbox_y1,
+                    },
+                }
+            )
     return redactions
 
 
-# def redact_pdf(pdf_file, words):
-#     pdf_contents = pdf_file.read()
-#     pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
-
-#     for word in words:
-#         rect = pymupdf.Rect(
-#             x0=word["pdfBbox"]["x"],
-#             y0=word["pdfBbox"]["y"],
-#             x1=word["pdfBbox"]["width"] + word["pdfBbox"]["x"],
-#             y1=word["pdfBbox"]["height"] + word["pdfBbox"]["y"],
-#         )
-
-#         pdf_document[word["page"]].add_redact_annot(rect, fill=(0, 0, 0), text="")
-#         pdf_document[word["page"]].apply_redactions()
-
-#     output = io.BytesIO()
-#     pdf_document.save(
-#         filename=output,
-#         encryption=pymupdf.PDF_ENCRYPT_AES_256,
-#         owner_pw="1234",
-#         user_pw="1234",
-#         permissions=(
-#             pymupdf.PDF_PERM_ACCESSIBILITY  # always use this
-#             | pymupdf.PDF_PERM_PRINT  # permit printing
-#             | pymupdf.PDF_PERM_COPY  # permit copying
-#             | pymupdf.PDF_PERM_ANNOTATE  # permit adding annotations
-#         ),
-#     )
-#     pdf_document.close()
-#     output.seek(0)
-
-#     return base64.b64encode(output.getvalue()).decode("utf-8")
-
-
-def redact_pdf(pdf_file, words):
-    try:
-        # Read the contents of the PDF file
-        pdf_contents = pdf_file.read()
+def redact_pdf(pdf_file, words, garbage=3, deflate=True):
+    """Blacks out the selected words, applying redactions once per page.
 
-        # Open the PDF document from the stream
-        pdf_document = pymupdf.open(stream=pdf_contents, filetype="pdf")
+    pdf_file is a path, a bytes-like buffer or a file object. `garbage` and
+    `deflate` are passed to PyMuPDF's save to drop unused objects and compress
+    streams.
+    """
+    try:
+        # Open the PDF document from its path or contents
+        pdf_document = open_pdf(pdf_source(pdf_file))
 
+        # Bucket the words by page so every page is only rewritten once
+        words_by_page = defaultdict(list)
         for word in words:
-            # Calculate the rectangle for redaction using bounding box coordinates
-            rect = pymupdf.Rect(
-                word["pdfBbox"]["x"],  # x0
-                word["pdfBbox"]["y"],  # y0
-                word["pdfBbox"]["width"] + word["pdfBbox"]["x"],  # x1
-                word["pdfBbox"]["height"] + word["pdfBbox"]["y"],  # y1
-            )
+            words_by_page[word["page"]].append(word)
 
-            # Add a redaction annotation on the specified page
-            page = pdf_document[word["page"]]
-            page.add_redact_annot(rect, fill=(0, 0, 0))  # Redaction fill color: black
-            page.apply_redactions()  # Apply the redaction to the page
+        for page_num, page_words in words_by_page.items():
+            page = pdf_document[page_num]
+
+            for word in page_words:
+                # Calculate the rectangle for redaction using bounding box coordinates
+                rect = pymupdf.Rect(
+                    word["pdfBbox"]["x"],  # x0
+                    word["pdfBbox"]["y"],  # y0
+                    word["pdfBbox"]["width"] + word["pdfBbox"]["x"],  # x1
+                    word["pdfBbox"]["height"] + word["pdfBbox"]["y"],  # y1
+                )
+
+                # Redaction fill color: black
+                page.add_redact_annot(rect, fill=(0, 0, 0))
+
+            page.apply_redactions()  # Apply all of the page's redactions at once
 
-        # Save the redacted PDF with encryption
         output = io.BytesIO()  # Save to memory
-        pdf_document.save(
-            output,  # Output to the BytesIO object
-        )
+        pdf_document.save(output, garbage=garbage, deflate=deflate)
         pdf_document.close()
 
-        # Seek to the start of the output and encode the PDF as base64
-        output.seek(0)
-        return base64.b64encode(output.getvalue()).decode("utf-8")
+        return output.getvalue()
 
     except Exception as e:
         print(f"Error: {e}")
         return None
 
 
-def ocr(pdf_file):
-    pdf_contents = pdf_file.read()
-    inputBuffer = io.BytesIO(pdf_contents)
+def ocr(pdf_file, progress=None, jobs=None, selective=True, min_chars=20):
+    """Adds a text layer with ocrmypdf; progress(pages_done, pages_total) if given.
+
+    pdf_file is a path, a bytes-like buffer or a file object. ocrmypdf runs on
+    `jobs` processes (all CPUs if None). With `selective`, only the pages
+    pages_needing_ocr picks are OCRed and spliced back into the original document;
+    the other pages are left as they are. A document that needs no OCR is returned
+    unchanged.
+    """
+    pdf_bytes, pdf_document = ocr_document(
+        pdf_source(pdf_file), progress, jobs, selective, min_chars
+    )
+    pdf_document.close()
+    return pdf_bytes
+
+
+def ocr_redact(
+    pdf_file,
+    level="High",
+    progress=None,
+    jobs=None,
+    selective=True,
+    min_chars=20,
+    batch_size=256,
+    n_process=1,
+    workers=1,
+    chunk_size=16,
+    min_parallel_pages=64,
+    ner_model=None,
+):
+    """OCRs the PDF and detects redactions in the result in one pass.
+
+    Returns the OCRed PDF bytes and the redactions, as ocr and redact would. The
+    detection runs on the OCRed document while it is still open, so the result is
+    never re-uploaded or parsed a second time.
+    """
+    ner_model = check_level(level, ner_model)
+
+    pdf_bytes, pdf_document = ocr_document(
+        pdf_source(pdf_file), progress, jobs, selective, min_chars
+    )
+    try:
+        redactions = []
+        for _, page_redactions in iter_document_redactions(
+            pdf_document,
+            pdf_bytes,
+            level,
+            batch_size,
+            n_process,
+            workers,
+            chunk_size,
+            min_parallel_pages,
+            ner_model,
+        ):
+            redactions.extend(page_redactions)
+    finally:
+        pdf_document.close()
+    return pdf_bytes, redactions
+
+
+def ocr_document(source, progress=None, jobs=None, selective=True, min_chars=20):
+    """Does the work of ocr, returning the PDF bytes and the OCRed document, open.
+
+    source is a path or a bytes-like buffer, as returned by pdf_source.
+    """
+    pdf_document = open_pdf(source)
+    try:
+        page_count = len(pdf_document)
+        pages = list(range(page_count))
+        if selective:
+            pages = pages_needing_ocr(pdf_document, min_chars)
+        skipped = page_count - len(pages)
+        on_pages = None
+        if progress is not None:
+            progress(skipped, page_count)
+
+            def on_pages(pages_done):
+                progress(skipped + pages_done, page_count)
+
+        if not pages:
+            return pdf_bytes_of(source), pdf_document
+
+        if len(pages) == page_count:
+            # Nothing to splice, OCR the original as a whole. Selected pages can
+            # still carry a few characters of text (e.g. a page number), which
+            # ocrmypdf would refuse to OCR over.
+            force_ocr = selective and has_text(pdf_document, pages)
+            output = io.BytesIO()
+            # ocrmypdf takes a path or a binary stream
+            if not isinstance(source, (str, os.PathLike)):
+                source = io.BytesIO(source)
+            run_ocrmypdf(
+                source,
+                output,
+                on_pages,
+                jobs=jobs,
+                force_ocr=force_ocr,
+            )
+            pdf_bytes = output.getvalue()
+            pdf_document.close()
+            pdf_document = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        else:
+            pdf_bytes = ocr_pages(pdf_document, pages, jobs, on_pages=on_pages)
+
+        if progress is not None:
+            progress(page_count, page_count)
+        return pdf_bytes, pdf_document
+    except Exception:
+        pdf_document.close()
+        raise
+
+
+def pages_needing_ocr(pdf_document, min_chars=20, min_image_coverage=0.25):
+    """Page numbers without a usable text layer but with image content to read.
+
+    A page qualifies when it has fewer than min_chars characters of extractable
+    text and images cover at least min_image_coverage of it, so digital pages and
+    blank pages are skipped.
+    """
+    pages = []
+    for page_num in range(len(pdf_document)):
+        page = pdf_document[page_num]
+        if len(page.get_text("text").strip()) >= min_chars:
+            continue
+
+        page_area = abs(page.rect)
+        image_area = sum(
+            abs(pymupdf.Rect(info["bbox"]) & page.rect)
+            for info in page.get_image_info()
+        )
+        if page_area and image_area >= min_image_coverage * page_area:
+            pages.append(page_num)
+    return pages
+
+
+def has_text(pdf_document, pages):
+    """Whether any of the given pages has extractable text.
+
+    ocrmypdf refuses such pages unless forced to rasterize and rebuild them, which
+    is only worth paying for when it would refuse.
+    """
+    return any(pdf_document[page_num].get_text("text").strip() for page_num in pages)
+
+
+def run_ocrmypdf(input_file, output_file, on_pages=None, **options):
+    """Runs ocrmypdf.ocr, calling on_pages(pages_done) as it OCRs pages if given."""
+    if on_pages is None:
+        return ocrmypdf.ocr(input_file=input_file, output_file=output_file, **options)
+    with ocr_progress.reporting(on_pages):
+        return ocrmypdf.ocr(
+            input_file=input_file,
+            output_file=output_file,
+            plugins=[ocr_progress.__name__],
+            **options,
+        )
+
+
+def ocr_pages(pdf_document, pages, jobs=None, garbage=3, deflate=True, on_pages=None):
+    """OCRs the given pages of an open PDF and splices them back into it.
+
+    The pages are copied into a separate PDF so ocrmypdf only rasterizes those;
+    it is written as a plain PDF, since PDF/A conversion of a fragment is wasted
+    work once it is merged into a document that is not PDF/A.
+    """
+    force_ocr = has_text(pdf_document, pages)
+    subset = pymupdf.open()
+    for page_num in pages:
+        subset.insert_pdf(pdf_document, from_page=page_num, to_page=page_num)
+    subset_contents = subset.tobytes()
+    subset.close()
+
     output = io.BytesIO()
-    ocrmypdf.ocr(input_file=inputBuffer, output_file=output)
-    output.seek(0)
-    return base64.b64encode(output.read()).decode("utf-8")
+    run_ocrmypdf(
+        io.BytesIO(subset_contents),
+        output,
+        on_pages,
+        jobs=jobs,
+        output_type="pdf",
+        force_ocr=force_ocr,
+    )
+
+    with pymupdf.open(stream=output.getvalue(), filetype="pdf") as ocred:
+        for position, page_num in enumerate(pages):
+            # Put the OCRed page in front of the original, then drop the original
+            pdf_document.insert_pdf(
+                ocred, from_page=position, to_page=position, start_at=page_num
+            )
+            pdf_document.delete_page(page_num + 1)
+
+    return pdf_document.tobytes(garbage=garbage, deflate=deflate)
@@ -1,76 +1,157 @@
-import base64
-import io
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import cv2
 import numpy as np
-import pytesseract
-from ultralytics import YOLO
-from services import text
-
-face_model_path = "yolov8n-face.pt"
-face_model = YOLO(face_model_path)
-
-
-def blur_area(image, x, y, w, h, blur_level=300):
-    """Blurs a specific area of the image"""
-    # Ensure blur_level is an odd number
-    if blur_level % 2 == 0:
-        blur_level += 1
-
-    # Extract the region of interest
-    ROI = image[y : y + h, x : x + w]
-
-    # Apply Gaussian Blur to the ROI
-    blurred = cv2.GaussianBlur(ROI, (blur_level, blur_level), 0)
-
-    # Place the blurred ROI back into the image
-    image[y : y + h, x : x + w] = blurred
-    return image
-
-
-def detect_and_blur_faces_and_text(image_file):
+from services import models, ocr, text
+from services.blur import blur_area, default_blur_mode
+from services.regions import propose_text_regions
+
+
+def detect_and_blur_faces_and_text(
+    image_file,
+    blur_mode=default_blur_mode,
+    ocr_backend="auto",
+    text_proposals=True,
+    ocr_workers=4,
+    max_proposal_coverage=0.6,
+):
     # Read the input image
     image = cv2.imdecode(np.frombuffer(image_file.read(), np.uint8), cv2.IMREAD_COLOR)
 
     # Detect faces using RetinaFace
     # faces = RetinaFace.detect_faces(image)
 
-    results = face_model.predict(image, conf=0.40)
-
-    for result in results:
-        for face in result.boxes.xyxy:
-            x1, y1, x2, y2 = face
-            w, h = int(x2) - int(x1), int(y2) - int(y1)
-            image = blur_area(image, int(x1), int(y1), w, h)
-
-    # Use Tesseract to detect text areas
-    text_data = pytesseract.image_to_data(
-        image=image, lang="eng", nice=1, output_type=pytesseract.Output.DICT
+    faces = detect_faces_batch([image])[0]
+    return blur_faces_and_text(
+        image,
+        faces,
+        blur_mode,
+        ocr_backend,
+        text_proposals,
+        ocr_workers,
+        max_proposal_coverage,
     )
 
-    t = " ".join(text_data["text"])
-
-    print("Extracted Text", t, end="\n\n")
 
-    words = text.get_words_to_redact(t)
-
-    t = " ".join(words)
-
-    # Blur detected text areas
-    for i in range(len(text_data["text"])):
-        if (
-            text_data["text"][i] in t and int(text_data["conf"][i]) > 60
-        ):  # Confidence threshold to filter out noise
+def detect_faces_batch(images):
+    """Detects faces in several images with one YOLO call, as (x1, y1, x2, y2) lists."""
+    if not images:
+        return []
+
+    with models.face_model_lock:
+        results = models.get("yolo-face").predict(images, conf=0.40)
+
+    # predict returns one result per input image, in order
+    return [
+        [tuple(int(value) for value in face) for face in result.boxes.xyxy]
+        for result in results
+    ]
+
+
+def blur_faces_and_text(
+    image,
+    faces,
+    blur_mode=default_blur_mode,
+    ocr_backend="auto",
+    text_proposals=True,
+    ocr_workers=4,
+    max_proposal_coverage=0.6,
+):
+    """Blurs the given faces and any redactable text in image, returning jpg bytes."""
+    for x1, y1, x2, y2 in faces:
+        image = blur_area(image, x1, y1, x2 - x1, y2 - y1, mode=blur_mode)
+
+    # Use Tesseract to detect text areas, only inside the proposed text regions
+    # unless they cover most of the image anyway (e.g. a scanned page)
+    regions = None
+    if text_proposals:
+        regions = propose_text_regions(image)
+        covered = sum(w * h for _, _, w, h in regions)
+        if covered > max_proposal_coverage * image.shape[0] * image.shape[1]:
+            regions = None
+
+    if regions is None:
+        text_data = ocr.get_backend(ocr_backend).image_to_data(image, lang="eng")
+    else:
+        text_data = ocr.regions_to_data(
+            image, regions, ocr_backend, lang="eng", workers=ocr_workers
+        )
+
+    # Blur the words covered by an entity or PII match
+    for i in text.redacted_tokens(text_data["text"]):
+        if int(text_data["conf"][i]) > 60:  # Confidence threshold to filter out noise
             x = text_data["left"][i]
             y = text_data["top"][i]
             w = text_data["width"][i]
             h = text_data["height"][i]
-            if len(text_data["text"][i].strip()) > 0:  # Ensure non-empty text
-                image = blur_area(image, x, y, w, h)
+            image = blur_area(image, x, y, w, h, mode=blur_mode)
 
-    # Save the redacted image
+    # Encode the redacted image
     _, buffer = cv2.imencode(".jpg", image)
-    output = io.BytesIO(buffer)
-    output.seek(0)
-
-    return base64.b64encode(output.getvalue()).decode("utf-8")
+    return buffer.tobytes()
+
+
+def iter_redact_images(
+    image_files,
+    batch_size=8,
+    workers=4,
+    blur_mode=default_blur_mode,
+    ocr_backend="auto",
+    text_proposals=True,
+    ocr_workers=4,
+    max_proposal_coverage=0.6,
+):
+    """Redacts many images, yielding (index, jpg bytes, seconds) as each completes.
+
+    Faces are detected with one YOLO call per batch_size images; OCR and blurring
+    then run on `workers` threads while the next batch is detected, so results come
+    back out of order. seconds runs from the start of the image's batch to its
+    result. An image that cannot be decoded yields None for its bytes.
+    """
+
+    def finish(index, image, faces, started):
+        jpg_bytes = blur_faces_and_text(
+            image,
+            faces,
+            blur_mode,
+            ocr_backend,
+            text_proposals,
+            ocr_workers,
+            max_proposal_coverage,
+        )
+        return index, jpg_bytes, time.perf_counter() - started
+
+    executor = ThreadPoolExecutor(workers)
+    pending = set()
+    try:
+        for batch_start in range(0, len(image_files), batch_size):
+            started = time.perf_counter()
+            batch = []
+            for index in range(
+                batch_start, min(batch_start + batch_size, len(image_files))
+            ):
+                data = np.frombuffer(image_files[index].read(), np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+                if image is None:
+                    yield index, None, time.perf_counter() - started
+                else:
+                    batch.append((index, image))
+
+            faces = detect_faces_batch([image for _, image in batch])
+            for (index, image), image_faces in zip(batch, faces):
+                pending.add(executor.submit(finish, index, image, image_faces, started))
+
+            # Hand back whatever finished while this batch was being detected
+            done = {future for future in pending if future.done()}
+            pending -= done
+            for future in done:
+                yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Stop early if the consumer goes away
+        executor.shutdown(wait=False, cancel_futures=True)
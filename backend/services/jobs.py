@@ -0,0 +1,274 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states, in lifecycle order
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+DELETED = "deleted"
+
+# States a job does not leave on its own
+finished_states = (DONE, FAILED, DELETED)
+
+job_fields = [
+    "id",
+    "kind",
+    "status",
+    "done",
+    "total",
+    "error",
+    "created",
+    "updated",
+]
+
+
+class MemoryJobStore:
+    """Keeps job records in process memory; they are lost on restart."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields, updated=time.time())
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def pending(self):
+        return []
+
+    def expired(self, before):
+        """Ids of finished jobs last updated before the given time."""
+        with self._lock:
+            return [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job["status"] in finished_states and job["updated"] < before
+            ]
+
+    def remove(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+class SQLiteJobStore:
+    """Keeps job records in a SQLite file so they survive restarts."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, job):
+        with self._connect() as connection:
+            connection.execute(
+                f"INSERT INTO jobs ({', '.join(job_fields)}) "
+                f"VALUES ({', '.join('?' for _ in job_fields)})",
+                [job[field] for field in job_fields],
+            )
+
+    def update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                [*fields.values(), job_id],
+            )
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(job_fields)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(job_fields, row)) if row is not None else None
+
+    def pending(self):
+        """Jobs that were queued or running when the previous process stopped."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT {', '.join(job_fields)} FROM jobs "
+                "WHERE status IN (?, ?) ORDER BY created",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return [dict(zip(job_fields, row)) for row in rows]
+
+    def expired(self, before):
+        """Ids of finished jobs last updated before the given time."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id FROM jobs "
+                f"WHERE status IN ({', '.join('?' for _ in finished_states)}) "
+                "AND updated < ?",
+                (*finished_states, before),
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def remove(self, job_id):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+class JobQueue:
+    """Runs long operations on a local worker pool and tracks their progress.
+
+    `handlers` maps a job kind to a function `handler(input_path, output_path,
+    progress)`, where `progress(done, total)` may be called to report progress.
+    Each job keeps its input and result under `directory/<job id>/`. Finished jobs
+    are forgotten, files and record, `ttl` seconds after their last update (never
+    if `ttl` is None).
+    """
+
+    def __init__(self, handlers, directory, store=None, workers=2, ttl=24 * 3600):
+        self.handlers = handlers
+        self.directory = directory
+        self.store = store if store is not None else MemoryJobStore()
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="job"
+        )
+        os.makedirs(directory, exist_ok=True)
+
+        # Pick up work a previous process accepted but never finished
+        for job in self.store.pending():
+            if os.path.exists(self._input_path(job["id"])):
+                self.store.update(job["id"], status=QUEUED, done=0)
+                self._executor.submit(self._run, job["id"], job["kind"])
+            else:
+                self.store.update(job["id"], status=FAILED, error="Input was lost")
+        self.expire()
+
+    def submit(self, kind, upload):
+        """Queues a job for `kind` on the uploaded file and returns its record."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self.expire()
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.directory, job_id))
+        upload.save(self._input_path(job_id))
+
+        now = time.time()
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": QUEUED,
+            "done": 0,
+            "total": 0,
+            "error": None,
+            "created": now,
+            "updated": now,
+        }
+        self.store.create(job)
+        self._executor.submit(self._run, job_id, kind)
+        return job
+
+    def get(self, job_id):
+        """Returns the job record, or None for an unknown id."""
+        return self.store.get(job_id)
+
+    def result_path(self, job_id):
+        """Path of a finished job's output, or None if it is not available."""
+        job = self.store.get(job_id)
+        if job is None or job["status"] != DONE:
+            return None
+        output_path = self._output_path(job_id)
+        if not os.path.exists(output_path):
+            return None
+        return output_path
+
+    def delete(self, job_id):
+        """Removes a job's files and marks it deleted.
+
+        The record stays, until it expires, so its status can still be read. A job
+        that is still queued is not run; one that is running finishes, but its
+        output is thrown away.
+        """
+        self.store.update(job_id, status=DELETED)
+        self._remove_files(job_id)
+
+    def expire(self):
+        """Forgets finished jobs that are older than the ttl."""
+        if self.ttl is None:
+            return
+        for job_id in self.store.expired(time.time() - self.ttl):
+            self._remove_files(job_id)
+            self.store.remove(job_id)
+
+    def _is_deleted(self, job_id):
+        job = self.store.get(job_id)
+        return job is None or job["status"] == DELETED
+
+    def _run(self, job_id, kind):
+        if self._is_deleted(job_id):
+            return
+        self.store.update(job_id, status=RUNNING)
+        last_update = 0.0
+
+        def progress(done, total):
+            nonlocal last_update
+            # Throttle store writes; every frame or page would swamp SQLite
+            now = time.monotonic()
+            if now - last_update >= 0.5 or done >= total:
+                last_update = now
+                self.store.update(job_id, done=done, total=total)
+
+        try:
+            self.handlers[kind](
+                self._input_path(job_id), self._output_path(job_id), progress
+            )
+        except Exception as e:
+            if not self._is_deleted(job_id):
+                traceback.print_exc()
+                self.store.update(job_id, status=FAILED, error=str(e))
+        else:
+            if not self._is_deleted(job_id):
+                self.store.update(job_id, status=DONE)
+        finally:
+            if self._is_deleted(job_id):
+                # Whatever the handler wrote after the job was deleted
+                self._remove_files(job_id)
+            elif os.path.exists(self._input_path(job_id)):
+                os.remove(self._input_path(job_id))
+        self.expire()
+
+    def _remove_files(self, job_id):
+        shutil.rmtree(os.path.join(self.directory, job_id), ignore_errors=True)
+
+    def _input_path(self, job_id):
+        return os.path.join(self.directory, job_id, "input")
+
+    def _output_path(self, job_id):
+        return os.path.join(self.directory, job_id, "output")
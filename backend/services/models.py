@@ -0,0 +1,99 @@
+import threading
+import time
+from functools import partial
+
+import psutil
+
+face_model_path = "yolov8n-face.pt"
+
+# spaCy NER tiers and the packages backing them
+spacy_packages = {
+    "sm": "en_core_web_sm",
+    "md": "en_core_web_md",
+    "lg": "en_core_web_lg",
+    "trf": "en_core_web_trf",
+}
+
+# Only doc.ents is used, so everything but the tokenizer and NER is left out. In the
+# CNN pipelines NER has its own internal tok2vec and the shared one only feeds the
+# tagger and parser; the transformer pipeline's NER listens to its transformer.
+spacy_exclude = ["tagger", "parser", "lemmatizer", "attribute_ruler", "senter"]
+
+# A YOLO instance is not safe to call from several threads at once, and the image
+# and video services share one
+face_model_lock = threading.Lock()
+
+
+def _load_spacy(tier):
+    import spacy
+
+    exclude = list(spacy_exclude)
+    if tier != "trf":
+        exclude.append("tok2vec")
+    return spacy.load(spacy_packages[tier], exclude=exclude)
+
+
+def _load_face_model():
+    from ultralytics import YOLO
+
+    return YOLO(face_model_path)
+
+
+def _load_ocr(backend):
+    from services import ocr
+
+    return getattr(ocr, backend)()
+
+
+# Model name -> loader. Libraries are imported by the loaders, so a process only pays
+# for the models it actually uses.
+loaders = {
+    **{f"spacy-{tier}": partial(_load_spacy, tier) for tier in spacy_packages},
+    "yolo-face": _load_face_model,
+    "tesserocr": partial(_load_ocr, "TesserocrBackend"),
+    "pytesseract": partial(_load_ocr, "PytesseractBackend"),
+}
+
+_models = {}
+_stats = {}
+_locks = {name: threading.Lock() for name in loaders}
+
+
+def get(name):
+    """Returns the named model, loading it on first use."""
+    if name not in loaders:
+        raise ValueError(f"Unknown model: {name}")
+
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    # Concurrent first requests wait for a single load
+    with _locks[name]:
+        if name not in _models:
+            process = psutil.Process()
+            rss_before = process.memory_info().rss
+            started = time.perf_counter()
+            _models[name] = loaders[name]()
+            _stats[name] = {
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "rss_delta_bytes": process.memory_info().rss - rss_before,
+            }
+        return _models[name]
+
+
+def warm_up(names=None):
+    """Loads the given models (all of them by default) ahead of the first request."""
+    for name in names if names is not None else loaders:
+        get(name)
+
+
+def stats():
+    """Load time and resident memory growth of each model, and the process RSS."""
+    return {
+        "models": {
+            name: {"loaded": name in _models, **_stats.get(name, {})}
+            for name in loaders
+        },
+        "rss_bytes": psutil.Process().memory_info().rss,
+    }
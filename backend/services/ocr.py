@@ -0,0 +1,165 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+import cv2
+from services import models
+
+# Optional. Imported here because its signal handlers can only be installed from the
+# main thread, and backends are otherwise first loaded on request threads.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Backend names accepted by get_backend; "auto" prefers the in-process engine
+ocr_backends = ["auto", "tesserocr", "pytesseract"]
+
+# Keys of the word-level result dicts returned by every backend
+data_keys = ("text", "conf", "left", "top", "width", "height")
+
+
+class PytesseractBackend:
+    """Runs the tesseract CLI once per call through pytesseract.
+
+    Every call starts a process and round-trips the image and results through temp
+    files, but it only needs the tesseract binary.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+
+        # Fails early if the tesseract binary is missing
+        pytesseract.get_tesseract_version()
+        self.pytesseract = pytesseract
+
+    def image_to_data(self, image, lang="eng"):
+        """Word boxes of a BGR or grayscale image, as a dict of parallel lists."""
+        text_data = self.pytesseract.image_to_data(
+            image, lang=lang, output_type=self.pytesseract.Output.DICT
+        )
+        # Keep the word level only, like the other backends
+        words = [
+            i
+            for i in range(len(text_data["text"]))
+            if text_data["level"][i] == 5
+        ]
+        return {key: [text_data[key][i] for i in words] for key in data_keys}
+
+
+class TesserocrBackend:
+    """Keeps tesseract engines loaded in-process and lends them out per call.
+
+    A TessBaseAPI is not safe to share between threads, so each call borrows an
+    idle engine, or loads a new one if all are busy, and hands it back afterwards.
+    Engines outlive the threads that used them, so request threads that come and
+    go do not reload the language data; there are as many as calls ever ran at
+    once.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+        self.tesserocr = tesserocr
+        self._lock = threading.Lock()
+        self._idle = defaultdict(list)  # Language -> engines not in use
+        # Fails early if the language data is missing
+        with self._api("eng"):
+            pass
+
+    @contextmanager
+    def _api(self, lang):
+        with self._lock:
+            api = self._idle[lang].pop() if self._idle[lang] else None
+        if api is None:
+            api = self.tesserocr.PyTessBaseAPI(lang=lang)
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with self._lock:
+                self._idle[lang].append(api)
+
+    def image_to_data(self, image, lang="eng"):
+        """Word boxes of a BGR or grayscale image, as a dict of parallel lists."""
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = image.shape
+        if not image.flags["C_CONTIGUOUS"]:  # Crops of a larger frame
+            image = image.copy()
+
+        text_data = {key: [] for key in data_keys}
+        word = self.tesserocr.RIL.WORD
+        with self._api(lang) as api:
+            api.SetImageBytes(image.tobytes(), width, height, 1, width)
+            api.Recognize()
+
+            iterator = api.GetIterator()
+            for result in self.tesserocr.iterate_level(iterator, word):
+                box = result.BoundingBox(word)
+                if box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                text_data["text"].append(result.GetUTF8Text(word) or "")
+                text_data["conf"].append(result.Confidence(word))
+                text_data["left"].append(x1)
+                text_data["top"].append(y1)
+                text_data["width"].append(x2 - x1)
+                text_data["height"].append(y2 - y1)
+        return text_data
+
+
+def regions_to_data(image, regions, ocr_backend="auto", lang="eng", workers=4):
+    """OCRs each (x, y, w, h) region of image in parallel.
+
+    Returns one word-level dict like image_to_data, with boxes in image coordinates
+    and words in region order.
+    """
+    backend = get_backend(ocr_backend)
+
+    def read(region):
+        x, y, w, h = region
+        return backend.image_to_data(image[y : y + h, x : x + w], lang=lang)
+
+    text_data = {key: [] for key in data_keys}
+    if len(regions) > 1 and workers > 1:
+        results = _executor(workers).map(read, regions)
+    else:
+        results = map(read, regions)
+    for (x, y, _, _), region_data in zip(regions, results):
+        region_data["left"] = [left + x for left in region_data["left"]]
+        region_data["top"] = [top + y for top in region_data["top"]]
+        for key in data_keys:
+            text_data[key].extend(region_data[key])
+    return text_data
+
+
+@lru_cache(maxsize=None)
+def _executor(workers):
+    # Shared across requests rather than a pool per call
+    return ThreadPoolExecutor(workers, thread_name_prefix="ocr")
+
+
+def get_backend(name="auto"):
+    """Returns the shared OCR backend, falling back to pytesseract under "auto"."""
+    if name not in ocr_backends:
+        raise ValueError(f"Unknown OCR backend: {name}")
+    if name == "auto":
+        name = _auto_backend()
+    return models.get(name)
+
+
+@lru_cache(maxsize=None)
+def _auto_backend():
+    # Resolved once, so a missing tesserocr is not re-imported on every call
+    try:
+        models.get("tesserocr")
+        return "tesserocr"
+    except (ImportError, RuntimeError):
+        return "pytesseract"
@@ -0,0 +1,53 @@
+import threading
+from contextlib import contextmanager
+
+from ocrmypdf import hookimpl
+
+# ocrmypdf plugin that reports the pages its OCR stage has finished. ocrmypdf creates
+# its progress bars on the thread that called ocrmypdf.ocr, so the callback for a
+# call is kept per thread.
+_local = threading.local()
+
+
+@contextmanager
+def reporting(callback):
+    """Calls callback(pages_done) as ocrmypdf.ocr calls on this thread OCR pages.
+
+    The calls must pass this module in `plugins`.
+    """
+    _local.callback = callback
+    try:
+        yield
+    finally:
+        _local.callback = None
+
+
+class PageProgress:
+    """Progress bar that forwards the OCR stage's page count to the callback."""
+
+    def __init__(self, *, total=None, desc=None, unit=None, disable=False, **kwargs):
+        self.callback = None
+        # The other stages count images or percent, not pages OCRed
+        if desc == "OCR" and unit == "page":
+            self.callback = getattr(_local, "callback", None)
+        self.done = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1, *, completed=None):
+        if self.callback is None:
+            return
+        previous = int(self.done)
+        # Pages are reported in halves, once rasterized and once OCRed
+        self.done = completed if completed is not None else self.done + n
+        if int(self.done) > previous:
+            self.callback(int(self.done))
+
+
+@hookimpl
+def get_progressbar_class():
+    return PageProgress
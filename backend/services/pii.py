@@ -0,0 +1,51 @@
+import re
+from functools import lru_cache
+
+# PII patterns as (group name, category, regex), in priority order. When two patterns
+# match at the same position the one listed first wins, so longer formats come before
+# the ones that would only match a prefix of them (a card number starts like an Aadhaar
+# number, which starts like a phone number).
+patterns = [
+    ("link", "Links", r"https?://[^\s]+"),
+    ("email", "Emails", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b"),
+    ("credit_card", "Credit or Debit Card", r"\b(?:\d{4}[-.\s]?){3}\d{4}\b"),
+    ("aadhaar", "Aadhaar Number", r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}\b"),
+    ("phone", "Phone Numbers", r"(?:(?:\+91|91)\s*-*\s*)?[6-9]\d{9}"),
+    ("pan", "PAN Number", r"\b[A-Z]{5}\d{4}[A-Z]\b"),
+    ("ip", "IP Address", r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b"),
+    ("ssn", "SSN", r"\b\d{3}-\d{2}-\d{4}\b"),
+    (
+        "alphanumeric",
+        "Credentials",
+        r"^(?!.*\b(?:\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})\b)(?=.*[A-Za-z])(?=.*\d)[A-Za-z\d]{2,}$",
+    ),
+]
+
+categories = {name: category for name, category, _ in patterns}
+
+all_groups = tuple(name for name, _, _ in patterns)
+
+# Every pattern above needs a digit, an "@" or a URL scheme, so text without any of
+# them can skip the scanner entirely. Keep this in sync when adding patterns.
+trigger_pattern = re.compile(r"[\d@]|http")
+
+
+@lru_cache(maxsize=None)
+def compile_scanner(groups=all_groups):
+    """Compiles the given pattern groups into one named-group alternation."""
+    return re.compile(
+        "|".join(
+            f"(?P<{name}>{pattern})" for name, _, pattern in patterns if name in groups
+        )
+    )
+
+
+def scan(text, groups=all_groups):
+    """Finds all PII matches in a single pass, returning (start, end, category) tuples."""
+    matches = []
+    if not trigger_pattern.search(text):
+        return matches
+
+    for match in compile_scanner(groups).finditer(text):
+        matches.append((match.start(), match.end(), categories[match.lastgroup]))
+    return matches
@@ -0,0 +1,185 @@
+import cv2
+from services.tracking import iou
+
+
+def _intersects(box1, box2, gap=0):
+    """Whether two (x, y, w, h) boxes overlap, or come within gap pixels."""
+    return (
+        box1[0] <= box2[0] + box2[2] + gap
+        and box2[0] <= box1[0] + box1[2] + gap
+        and box1[1] <= box2[1] + box2[3] + gap
+        and box2[1] <= box1[1] + box1[3] + gap
+    )
+
+
+def _union(box1, box2):
+    x1, y1 = min(box1[0], box2[0]), min(box1[1], box2[1])
+    x2 = max(box1[0] + box1[2], box2[0] + box2[2])
+    y2 = max(box1[1] + box1[3], box2[1] + box2[3])
+    return x1, y1, x2 - x1, y2 - y1
+
+
+def _corners(box):
+    x, y, w, h = box
+    return x, y, x + w, y + h
+
+
+def merge_boxes(boxes, gap=0):
+    """Merges (x, y, w, h) boxes that overlap or lie within gap pixels of each other."""
+    merged = []
+    for box in boxes:
+        # Keep absorbing until the box no longer touches any merged box
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if _intersects(box, other, gap):
+                    merged.remove(other)
+                    box = _union(box, other)
+                    changed = True
+                    break
+        merged.append(box)
+    return merged
+
+
+def propose_text_regions(
+    image, max_side=1600, min_height=8, max_height=0.25, min_fill=0.4, padding=16
+):
+    """Finds (x, y, w, h) boxes likely to hold text, without running OCR.
+
+    Text has dense, high-contrast strokes: the morphological gradient is binarised
+    and closed horizontally so the characters of a line join into one blob, and
+    blobs filling at least min_fill of their bounding box are kept. Lines shorter
+    than min_height pixels or taller than max_height of the image are dropped.
+    Boxes are grown by padding and merged, so each can be OCRed on its own.
+    """
+    height, width = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    # Work on a bounded size; proposals only need to be roughly right
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, line_kernel)
+    # Two-level hierarchy: outer boundaries, including blobs inside the holes of
+    # other blobs (text on a card in a photo), and the holes themselves
+    contours, hierarchy = cv2.findContours(
+        connected, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE
+    )
+
+    boxes = []
+    for contour, (_, _, _, parent) in zip(contours, hierarchy[0] if contours else ()):
+        if parent != -1:  # A hole
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < min_height * scale or h > max_height * gray.shape[0]:
+            continue
+        # A closed line of text is a solid, roughly rectangular blob
+        if cv2.contourArea(contour) < min_fill * w * h:
+            continue
+
+        # Back to image coordinates, padded and clipped
+        x1 = max(int(x / scale) - padding, 0)
+        y1 = max(int(y / scale) - padding, 0)
+        x2 = min(int((x + w) / scale) + padding, width)
+        y2 = min(int((y + h) / scale) + padding, height)
+        boxes.append((x1, y1, x2 - x1, y2 - y1))
+
+    # Reading order, so OCR text joined across boxes stays in sequence
+    return sorted(merge_boxes(boxes), key=lambda box: (box[1], box[0]))
+
+
+class TextRegionStore:
+    """Live text regions of a video, indexed on a coarse grid.
+
+    Detections from the same frame are merged when they overlap or lie within
+    `merge_gap` pixels (words on a line become one region). A detection that
+    overlaps a stored region by at least `merge_iou` is merged with it into their
+    union, so a partial re-detection never shrinks what is covered. Regions not
+    re-detected within `ttl` frames expire, so blur cost follows the number of live
+    regions rather than the length of the video.
+    """
+
+    def __init__(self, ttl=60, merge_gap=4, merge_iou=0.3, cell_size=64):
+        self.ttl = ttl
+        self.merge_gap = merge_gap
+        self.merge_iou = merge_iou
+        self.cell_size = cell_size
+        self._regions = {}  # id -> [box, last frame seen]
+        self._cells = {}  # (col, row) -> ids of regions touching that cell
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._regions)
+
+    def add(self, boxes, frame_index, area=None):
+        """Records a frame's detections.
+
+        If only `area` of the frame was searched, regions outside it could not be
+        re-detected and are kept alive as if they had been.
+        """
+        if area is not None:
+            for region_id in list(self._regions):
+                if not _intersects(self._regions[region_id][0], area):
+                    self._regions[region_id][1] = frame_index
+
+        for box in merge_boxes(boxes, self.merge_gap):
+            for region_id in self._query_ids(box):
+                stored = self._regions[region_id][0]
+                if iou(_corners(stored), _corners(box)) >= self.merge_iou:
+                    box = _union(stored, box)
+                    self._remove(region_id)
+            self._insert(box, frame_index)
+
+    def expire(self, frame_index):
+        """Drops regions last seen more than ttl frames before frame_index."""
+        for region_id, (_, last_seen) in list(self._regions.items()):
+            if frame_index - last_seen > self.ttl:
+                self._remove(region_id)
+
+    def query(self, area=None):
+        """Live regions intersecting area, or all of them if area is None."""
+        if area is None:
+            return [box for box, _ in self._regions.values()]
+        return [self._regions[region_id][0] for region_id in self._query_ids(area)]
+
+    def _query_ids(self, area):
+        ids = set()
+        for cell in self._cells_of(area):
+            ids.update(self._cells.get(cell, ()))
+        return [
+            region_id
+            for region_id in ids
+            if _intersects(self._regions[region_id][0], area)
+        ]
+
+    def _insert(self, box, frame_index):
+        region_id = self._next_id
+        self._next_id += 1
+        self._regions[region_id] = [box, frame_index]
+        for cell in self._cells_of(box):
+            self._cells.setdefault(cell, set()).add(region_id)
+
+    def _remove(self, region_id):
+        box, _ = self._regions.pop(region_id)
+        for cell in self._cells_of(box):
+            ids = self._cells[cell]
+            ids.discard(region_id)
+            if not ids:
+                del self._cells[cell]
+
+    def _cells_of(self, box):
+        x, y, w, h = box
+        col1, row1 = max(x, 0) // self.cell_size, max(y, 0) // self.cell_size
+        col2 = max(x + w, 0) // self.cell_size
+        row2 = max(y + h, 0) // self.cell_size
+        return [
+            (col, row)
+            for col in range(col1, col2 + 1)
+            for row in range(row1, row2 + 1)
+        ]
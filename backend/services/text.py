@@ -1,62 +1,95 @@
-import spacy
-import re
+from bisect import bisect_left, bisect_right
 
-nlp = spacy.load("en_core_web_sm")
+from services import models, pii
 
-email_pattern = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b")
-phone_pattern = re.compile(r"^(?:\+91|91)?(?:\s*-*\s*)?(\d{10}|\d{11})$")
-aadhaar_pattern = re.compile(r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}\b")
-pan_pattern = re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b")
-ip_pattern = re.compile(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b")
-ssn_pattern = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-credit_card_pattern = re.compile(r"\b(?:\d{4}[-.\s]?){3}\d{4}\b")
-links_pattern = re.compile(r"https?://[^\s]+")
+# PII scanner groups matched in OCR text
+text_pii_groups = (
+    "email",
+    "phone",
+    "aadhaar",
+    "pan",
+    "ip",
+    "ssn",
+    "credit_card",
+    "link",
+)
+
+# spaCy entity labels redacted in OCR text
+text_entity_labels = {
+    "CARDINAL",
+    "DATE",
+    "EVENT",
+    "FAC",
+    "GPE",
+    "LANGUAGE",
+    "LAW",
+    "LOC",
+    "MONEY",
+    "NORP",
+    "ORDINAL",
+    "ORG",
+    "PERCENT",
+    "PERSON",
+    "PRODUCT",
+    "QUANTITY",
+    "TIME",
+    "WORK_OF_ART",
+    "MISC",
+    "PER",
+}
+
+
+def get_spans_to_redact(text):
+    """(start, end) character offsets of the entities and PII matches in text."""
+    doc = models.get("spacy-sm")(text)
+
+    spans = [
+        (ent.start_char, ent.end_char)
+        for ent in doc.ents
+        if ent.label_ in text_entity_labels
+    ]
+    spans.extend((start, end) for start, end, _ in pii.scan(text, text_pii_groups))
+    return spans
 
 
 def get_words_to_redact(text):
-    doc = nlp(text)
-
-    words = set()
-
-    regex_matches = []
-
-    for ent in doc.ents:
-        if ent.label_ in [
-            "CARDINAL",
-            "DATE",
-            "EVENT",
-            "FAC",
-            "GPE",
-            "LANGUAGE",
-            "LAW",
-            "DATE",
-            "LOC",
-            "MONEY",
-            "NORP",
-            "ORDINAL",
-            "ORG",
-            "PERCENT",
-            "PERSON",
-            "PRODUCT",
-            "QUANTITY",
-            "TIME",
-            "WORK_OF_ART",
-            "LOC",
-            "MISC",
-            "ORG",
-            "PER",
-        ]:
-            words.add(ent.text)
-
-    regex_matches.extend(email_pattern.findall(text))
-    regex_matches.extend(phone_pattern.findall(text))
-    regex_matches.extend(aadhaar_pattern.findall(text))
-    regex_matches.extend(pan_pattern.findall(text))
-    regex_matches.extend(ip_pattern.findall(text))
-    regex_matches.extend(ssn_pattern.findall(text))
-    regex_matches.extend(credit_card_pattern.findall(text))
-    regex_matches.extend(links_pattern.findall(text))
-
-    words.update(regex_matches)
-
-    return list(words)
+    return list({text[start:end] for start, end in get_spans_to_redact(text)})
+
+
+def join_tokens(tokens):
+    """Joins the non-blank OCR tokens with spaces.
+
+    Returns the text, the indices of the joined tokens and the character offset at
+    which each of them starts.
+    """
+    indices = [i for i, token in enumerate(tokens) if token.strip()]
+    starts = []
+    offset = 0
+    for i in indices:
+        starts.append(offset)
+        offset += len(tokens[i]) + 1
+    return " ".join(tokens[i] for i in indices), indices, starts
+
+
+def redacted_tokens(tokens):
+    """Indices of the OCR tokens overlapped by an entity or PII match.
+
+    Matches are found in the joined text and mapped back to tokens by offset, so
+    only the tokens a match actually covers are returned.
+    """
+    joined, indices, starts = join_tokens(tokens)
+    return align_spans(tokens, indices, starts, get_spans_to_redact(joined))
+
+
+def align_spans(tokens, indices, starts, spans):
+    """Indices of the tokens overlapped by (start, end) spans of join_tokens text."""
+    redacted = set()
+    for start, end in spans:
+        # From the token containing start to the last one starting before end
+        first = max(bisect_right(starts, start) - 1, 0)
+        last = bisect_left(starts, end) - 1
+        for position in range(first, last + 1):
+            token_end = starts[position] + len(tokens[indices[position]])
+            if token_end > start:  # Skip a token the match only follows
+                redacted.add(indices[position])
+    return sorted(redacted)
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+
+
+def iou(box1, box2):
+    """Intersection over union of two (x1, y1, x2, y2) boxes."""
+    x1, y1 = max(box1[0], box2[0]), max(box1[1], box2[1])
+    x2, y2 = min(box1[2], box2[2]), min(box1[3], box2[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    if intersection == 0:
+        return 0.0
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    return intersection / (area1 + area2 - intersection)
+
+
+class FaceTracker:
+    """Carries face boxes from keyframe detections across the frames in between.
+
+    On keyframes, detections are associated with existing tracks by IoU; a track the
+    detector misses is kept for up to `max_missed` keyframes so a single missed
+    detection does not unblur a face. On other frames every box is shifted by the
+    median sparse optical flow of the features inside it. Returned boxes are grown
+    by `padding` (a fraction of the box size) on each side to absorb drift.
+    """
+
+    def __init__(self, padding=0.15, iou_threshold=0.3, max_missed=1):
+        self.padding = padding
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = []  # [box, missed keyframes]
+        self.prev_gray = None
+
+    def update(self, frame, faces):
+        """Replaces the tracks with a keyframe's detections, returning padded boxes."""
+        tracks = [[list(face), 0] for face in faces]
+
+        for box, missed in self.tracks:
+            if missed >= self.max_missed:
+                continue
+            if all(iou(box, face) < self.iou_threshold for face in faces):
+                tracks.append([box, missed + 1])
+
+        self.tracks = tracks
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return self.boxes(frame)
+
+    def track(self, frame):
+        """Moves the tracks onto a frame without detections, returning padded boxes."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.prev_gray is not None:
+            for track in self.tracks:
+                dx, dy = self._flow(self.prev_gray, gray, track[0])
+                x1, y1, x2, y2 = track[0]
+                track[0] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+
+        self.prev_gray = gray
+        return self.boxes(frame)
+
+    def boxes(self, frame):
+        """Current track boxes, padded and clipped to the frame, as int tuples."""
+        height, width = frame.shape[:2]
+        boxes = []
+        for (x1, y1, x2, y2), _ in self.tracks:
+            pad_x = (x2 - x1) * self.padding
+            pad_y = (y2 - y1) * self.padding
+            box = (
+                int(max(x1 - pad_x, 0)),
+                int(max(y1 - pad_y, 0)),
+                int(min(x2 + pad_x, width)),
+                int(min(y2 + pad_y, height)),
+            )
+            if box[2] > box[0] and box[3] > box[1]:
+                boxes.append(box)
+        return boxes
+
+    def _flow(self, prev_gray, gray, box):
+        """Median displacement of the trackable features inside box."""
+        height, width = prev_gray.shape
+        x1, y1 = int(max(box[0], 0)), int(max(box[1], 0))
+        x2, y2 = int(min(box[2], width)), int(min(box[3], height))
+        if x2 <= x1 or y2 <= y1:
+            return 0.0, 0.0
+
+        points = cv2.goodFeaturesToTrack(
+            prev_gray[y1:y2, x1:x2], maxCorners=30, qualityLevel=0.01, minDistance=3
+        )
+        if points is None:
+            return 0.0, 0.0
+        points = points + np.array([x1, y1], dtype=np.float32)  # Crop to frame coords
+
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2
+        )
+        tracked = status.reshape(-1) == 1
+        if not tracked.any():
+            return 0.0, 0.0
+
+        displacement = (moved - points).reshape(-1, 2)[tracked]
+        dx, dy = np.median(displacement, axis=0)
+        return float(dx), float(dy)
@@ -0,0 +1,47 @@
+import io
+import os
+import tempfile
+
+from flask import Request
+
+
+class SpooledRequest(Request):
+    """Request that keeps small uploads in memory and writes larger ones to disk.
+
+    An upload is held in memory only when the whole request body is known to be at
+    most max_memory_bytes; anything larger, or of unknown length, is written to a
+    named temporary file in directory, so services can open it by path. The file
+    is deleted when the request closes it.
+    """
+
+    max_memory_bytes = 1024 * 1024
+    directory = None
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if (
+            total_content_length is not None
+            and total_content_length <= self.max_memory_bytes
+        ):
+            return io.BytesIO()
+        # Keep the extension, some decoders go by it
+        suffix = os.path.splitext(filename or "")[1]
+        return tempfile.NamedTemporaryFile("wb+", suffix=suffix, dir=self.directory)
+
+
+def upload_path(uploaded_file):
+    """Path of the file an upload was spooled to, or None if it is in memory."""
+    name = getattr(uploaded_file.stream, "name", None)
+    if not isinstance(name, str) or not os.path.isfile(name):
+        return None
+    uploaded_file.stream.flush()
+    return name
+
+
+def upload_source(uploaded_file):
+    """The upload's path if it was spooled to disk, else its bytes."""
+    path = upload_path(uploaded_file)
+    if path is not None:
+        return path
+    return uploaded_file.read()
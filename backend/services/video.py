@@ -1,37 +1,31 @@
-import base64
 import os
+import queue
 import tempfile
+import threading
+import time
 import cv2
-import pytesseract
 import numpy as np
-from ultralytics import YOLO
-from skimage.metrics import structural_similarity as compare_ssim
-from concurrent.futures import ThreadPoolExecutor
-
-# Load YOLOv8 model for face detection
-face_model_path = "yolov8n-face.pt"
-face_model = YOLO(face_model_path)
-
-
-def blur_area(image, x, y, w, h, blur_level=300):
-    """Blurs a specific area of the image."""
-    if blur_level % 2 == 0:
-        blur_level += 1
-    ROI = image[y : y + h, x : x + w]
-    if ROI.size == 0:
-        return image
-    blurred = cv2.GaussianBlur(ROI, (blur_level, blur_level), 0)
-    image[y : y + h, x : x + w] = blurred
-    return image
+from services import models, ocr
+from services.blur import blur_area, default_blur_mode
+from services.change import bounding_area, get_change_detector
+from services.regions import TextRegionStore
+from services.tracking import FaceTracker
 
 
-def blur_detected_text(image, cached_text_regions, extend_box=5):
-    """Detects text using pytesseract and blurs the detected regions."""
+def detect_text_regions(image, area=None, ocr_backend="auto"):
+    """Detects text with Tesseract, returning (x, y, w, h) boxes.
+
+    If area is given as (x, y, w, h), only that part of the image is searched.
+    """
+    offset_x, offset_y = 0, 0
+    if area is not None:
+        offset_x, offset_y, w, h = area
+        image = image[offset_y : offset_y + h, offset_x : offset_x + w]
+
     gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    text_data = pytesseract.image_to_data(
-        gray_image, output_type=pytesseract.Output.DICT
-    )
+    text_data = ocr.get_backend(ocr_backend).image_to_data(gray_image)
 
+    text_regions = []
     for i in range(len(text_data["text"])):
         confidence = int(text_data["conf"][i])
         if confidence > 60:  # Only consider high-confidence text detections
@@ -42,28 +36,55 @@ def blur_detected_text(image, cached_text_regions, extend_box=5):
             detected_text = text_data["text"][i].strip()
 
             if len(detected_text) > 0:
-                cached_text_regions.append((x, y, w, h))
+                text_regions.append((x + offset_x, y + offset_y, w, h))
 
-    # Blur all cached text regions
-    for x, y, w, h in cached_text_regions:
+    return text_regions
+
+
+def blur_text_regions(image, text_regions, extend_box=5, mode=default_blur_mode):
+    """Blurs the given text regions, extended by extend_box pixels on every side."""
+    for x, y, w, h in text_regions:
         image = blur_area(
             image,
             x - extend_box,
             y - extend_box,
             w + 2 * extend_box,
             h + 2 * extend_box,
+            mode=mode,
         )
 
     return image
 
 
+def blur_detected_text(image, cached_text_regions, extend_box=5):
+    """Detects text with Tesseract and blurs the detected regions."""
+    cached_text_regions.extend(detect_text_regions(image))
+
+    # Blur all cached text regions
+    return blur_text_regions(image, cached_text_regions, extend_box)
+
+
 def detect_faces(frame, resize_factor=0.5):
     """Detect faces using YOLOv8 with optional resizing."""
-    resized_frame = cv2.resize(frame, (0, 0), fx=resize_factor, fy=resize_factor)
-    results = face_model.predict(resized_frame, conf=0.40)
+    return detect_faces_batch([frame], resize_factor)[0]
 
+
+def detect_faces_batch(frames, resize_factor=0.5):
+    """Detect faces in several frames with a single YOLOv8 call."""
+    if not frames:
+        return []
+
+    resized_frames = [
+        cv2.resize(frame, (0, 0), fx=resize_factor, fy=resize_factor)
+        for frame in frames
+    ]
+    with models.face_model_lock:
+        results = models.get("yolo-face").predict(resized_frames, conf=0.40)
+
+    # predict returns one result per input frame, in order
     detected_faces = []
     for result in results:
+        faces = []
         for face in result.boxes.xyxy:
             x1, y1, x2, y2 = face
             x1, y1, x2, y2 = (
@@ -72,93 +93,423 @@ def detect_faces(frame, resize_factor=0.5):
                 int(x2 / resize_factor),
                 int(y2 / resize_factor),
             )
-            detected_faces.append((x1, y1, x2, y2))
+            faces.append((x1, y1, x2, y2))
+        detected_faces.append(faces)
 
     return detected_faces
 
 
+def analyze_frames(frames, text_areas=None, ocr_backend="auto"):
+    """Runs the detectors on several frames, returning (faces, text_regions) for each.
+
+    text_areas optionally limits text detection to one (x, y, w, h) area per frame
+    (None for the whole frame); faces are always searched in the whole frame.
+    """
+    if text_areas is None:
+        text_areas = [None] * len(frames)
+
+    # Faster detection with resizing, one YOLO call for the whole batch
+    faces = detect_faces_batch(frames, resize_factor=0.5)
+    return [
+        (frame_faces, detect_text_regions(frame, area, ocr_backend))
+        for frame, frame_faces, area in zip(frames, faces, text_areas)
+    ]
+
+
+def analyze_frame(frame):
+    """Runs the detectors on a frame, returning (faces, text_regions)."""
+    return analyze_frames([frame])[0]
+
+
+def blur_frame(frame, faces, text_regions, mode=default_blur_mode):
+    """Blurs the detected faces and text regions of a frame."""
+    for x1, y1, x2, y2 in faces:
+        frame = blur_area(frame, x1, y1, x2 - x1, y2 - y1, mode=mode)
+
+    return blur_text_regions(frame, text_regions, mode=mode)
+
+
 def process_frame(frame, cached_text_regions):
     """Process a single frame to blur faces and text."""
-    faces = detect_faces(frame, resize_factor=0.5)  # Faster detection with resizing
-    for x1, y1, x2, y2 in faces:
-        frame = blur_area(frame, x1, y1, x2 - x1, y2 - y1)
+    faces, text_regions = analyze_frame(frame)
 
     # Blur detected text, using cached regions to prevent toggling
-    frame = blur_detected_text(frame, cached_text_regions)
-
-    return frame
+    cached_text_regions.extend(text_regions)
+    return blur_frame(frame, faces, cached_text_regions)
 
 
-def frame_similarity(frame1, frame2, threshold=0.95):
-    """Calculate the similarity between two frames using SSIM."""
-    gray_frame1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-    gray_frame2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    score, _ = compare_ssim(gray_frame1, gray_frame2, full=True)
+def frame_similarity(frame1, frame2, threshold=0.95, detector=None):
+    """Whether two frames are similar, by the share of unchanged blocks."""
+    if detector is None:
+        detector = get_change_detector()
+    score, _ = detector.compare(detector.signature(frame1), detector.signature(frame2))
     return score >= threshold  # Returns True if frames are similar
 
 
-def process_video(input_video_bytes, similarity_threshold=0.95, max_workers=4):
-    """Process video to blur faces and text, skipping similar frames with multithreading."""
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_input_file:
-            temp_input_file.write(input_video_bytes)
-            temp_input_path = temp_input_file.name
+# Marks the end of a pipeline queue's stream
+_END = object()
+
+# What the pipeline does with a decoded frame
+ANALYZE = "analyze"  # Run the detectors
+REUSE = "reuse"  # Repeat the previous output frame
+TRACK = "track"  # Move the previous face boxes with the tracker
+
+
+def _put(pipeline_queue, item, stop):
+    """Blocking put that gives up once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            pipeline_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(pipeline_queue, stop):
+    """Blocking get that returns None once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            return pipeline_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+def process_video_file(
+    input_video_path,
+    output_video_path,
+    similarity_threshold=0.95,
+    max_workers=4,
+    queue_size=32,
+    batch_size=8,
+    keyframe_interval=1,
+    box_padding=0.15,
+    change_detector="diff",
+    text_region_ttl=2.0,
+    blur_mode=default_blur_mode,
+    ocr_backend="auto",
+    progress=None,
+):
+    """Process the video at input_video_path, writing the blurred video to output_video_path.
+
+    Frames flow through decode -> analyze -> blur -> encode stages connected by
+    bounded queues. Analysis runs on max_workers threads; a reorder buffer in front
+    of the blur stage restores frame order, and at most queue_size frames are in
+    flight at once. If given, progress(frames_done, frames_total) is called as
+    frames are written. Returns per-stage throughput statistics.
+    """
+    cap = cv2.VideoCapture(input_video_path)
+
+    if not cap.isOpened():
+        raise ValueError("Error: Could not open video file")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+
+    detector = get_change_detector(change_detector)
+    stop = threading.Event()
+    errors = []
+    # Frames decoded but not yet encoded; caps memory whatever stage is slowest
+    in_flight = threading.Semaphore(queue_size)
+    analyze_queue = queue.Queue(queue_size)
+    reorder_queue = queue.Queue()  # Bounded by in_flight
+    encode_queue = queue.Queue(queue_size)
+
+    stages = ["decode", "analyze", "blur", "encode"]
+    stats = {stage: {"frames": 0, "seconds": 0.0} for stage in stages}
+    stats["keyframes"] = 0
+    stats_lock = threading.Lock()
+
+    def record(stage, started):
+        with stats_lock:
+            stats[stage]["frames"] += 1
+            stats[stage]["seconds"] += time.perf_counter() - started
+
+    def changed_area(regions):
+        """Area to re-run text detection in, or None for the whole frame."""
+        changed = sum(w * h for _, _, w, h in regions)
+        # Text already seen outside the changed blocks stays in the region cache;
+        # only narrow OCR down when the change is small enough to be worth it
+        if changed == 0 or changed > width * height / 2:
+            return None
+        # Pad by a block so text straddling a block edge is not cut off
+        return bounding_area(
+            regions, width, height, padding=max(width, height) // 16
+        )
 
-        cap = cv2.VideoCapture(temp_input_path)
+    def decode():
+        """Reads frames in order and decides which of them need the detectors."""
+        prev_signature = None
+        analyzed_signature = None
+        since_keyframe = 0
+        index = 0
+        while True:
+            while not in_flight.acquire(timeout=0.1):
+                if stop.is_set():
+                    return
+
+            started = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                in_flight.release()
+                break
+
+            signature = detector.signature(frame)
+            area = None  # Where text detection runs; None is the whole frame
+
+            if keyframe_interval > 1:
+                # Detect on every keyframe_interval-th frame or on a scene change,
+                # and track faces in between
+                scene_change = (
+                    prev_signature is None
+                    or detector.compare(prev_signature, signature)[0]
+                    < similarity_threshold
+                )
+                since_keyframe += 1
+                if scene_change or since_keyframe >= keyframe_interval:
+                    mode = ANALYZE
+                    since_keyframe = 0
+                    if not scene_change:
+                        _, regions = detector.compare(analyzed_signature, signature)
+                        area = changed_area(regions)
+                    analyzed_signature = signature
+                else:
+                    mode = TRACK
+                prev_signature = signature
+            else:
+                similarity = 0.0
+                if analyzed_signature is not None:
+                    similarity, regions = detector.compare(
+                        analyzed_signature, signature
+                    )
+                if similarity >= similarity_threshold:
+                    mode = REUSE
+                else:
+                    mode = ANALYZE
+                    if analyzed_signature is not None:
+                        area = changed_area(regions)
+                    analyzed_signature = signature
+            record("decode", started)
+
+            if not _put(analyze_queue, (index, frame, mode, area), stop):
+                return
+            index += 1
 
-        if not cap.isOpened():
-            raise ValueError("Error: Could not open video file")
+        for _ in range(max_workers):
+            _put(analyze_queue, _END, stop)
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    def analyze():
+        """Runs the detectors on frames that differ from their predecessor."""
+        finished = False
+        while not finished:
+            item = _get(analyze_queue, stop)
+            if item is None:
+                return
+            if item is _END:
+                break
+
+            # Take whatever else is already queued, up to batch_size frames
+            batch = [item]
+            while len(batch) < batch_size:
+                try:
+                    item = analyze_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+
+            started = time.perf_counter()
+            to_analyze = [item for item in batch if item[2] == ANALYZE]
+            detections = iter(
+                analyze_frames(
+                    [frame for _, frame, _, _ in to_analyze],
+                    [area for _, _, _, area in to_analyze],
+                    ocr_backend,
+                )
+            )
+            for index, frame, mode, area in batch:
+                reorder_queue.put(
+                    (
+                        index,
+                        frame,
+                        mode,
+                        area,
+                        next(detections) if mode == ANALYZE else None,
+                    )
+                )
+            with stats_lock:
+                stats["analyze"]["frames"] += len(batch)
+                stats["analyze"]["seconds"] += time.perf_counter() - started
+                stats["keyframes"] += len(to_analyze)
+
+        reorder_queue.put(_END)
+
+    def blur():
+        """Blurs frames strictly in order, reusing the last output for similar frames."""
+        pending = {}  # Reorder buffer: frame index -> analyzed frame
+        next_index = 0
+        finished_workers = 0
+        prev_frame = None
+        text_regions = TextRegionStore(
+            # Regions must outlive the gap between two keyframes
+            ttl=max(int(text_region_ttl * fps), 2 * keyframe_interval)
+        )
+        tracker = FaceTracker(padding=box_padding)
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_output_file:
-            temp_output_path = temp_output_file.name
+        while True:
+            if next_index not in pending:
+                if finished_workers == max_workers:
+                    break
+                item = _get(reorder_queue, stop)
+                if item is None:
+                    return
+                if item is _END:
+                    finished_workers += 1
+                else:
+                    pending[item[0]] = item
+                continue
+
+            index, frame, mode, area, detections = pending.pop(next_index)
+            started = time.perf_counter()
+            if mode == REUSE and prev_frame is not None:
+                frame = prev_frame
+            else:
+                if mode == TRACK:
+                    faces = tracker.track(frame)
+                else:
+                    faces, detected_text = detections
+                    # Keep recently seen text regions to prevent toggling
+                    text_regions.add(detected_text, index, area)
+                    if keyframe_interval > 1:
+                        faces = tracker.update(frame, faces)
+                text_regions.expire(index)
+                frame = blur_frame(frame, faces, text_regions.query(), blur_mode)
+                prev_frame = frame
+            record("blur", started)
+
+            if not _put(encode_queue, frame, stop):
+                return
+            next_index += 1
 
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(temp_output_path, fourcc, fps, (width, height))
+        _put(encode_queue, _END, stop)
 
-        prev_frame = None
-        cached_text_regions = []
-
-        def process_and_write_frame(frame):
-            """Process a frame and write it to the output video."""
-            nonlocal prev_frame
-            if prev_frame is not None and frame_similarity(
-                prev_frame, frame, similarity_threshold
-            ):
-                out.write(prev_frame)
+    def encode():
+        """Writes frames to the output video."""
+        frames_done = 0
+        while True:
+            frame = _get(encode_queue, stop)
+            if frame is None or frame is _END:
                 return
 
-            processed_frame = process_frame(frame, cached_text_regions)
-            out.write(processed_frame)
-            prev_frame = processed_frame
+            started = time.perf_counter()
+            out.write(frame)
+            record("encode", started)
+            in_flight.release()
+
+            frames_done += 1
+            if progress is not None:
+                progress(frames_done, max(total_frames, frames_done))
+
+    def run_stage(stage):
+        try:
+            stage()
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=run_stage, args=(stage,), daemon=True)
+        for stage in [decode, *[analyze] * max_workers, blur, encode]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cap.release()
+    out.release()
+
+    if errors:
+        raise errors[0]
+
+    stats["wall_seconds"] = time.perf_counter() - started
+    for stage in stages:
+        stage_stats = stats[stage]
+        stage_stats["fps"] = (
+            stage_stats["frames"] / stage_stats["seconds"]
+            if stage_stats["seconds"]
+            else 0.0
+        )
+    return stats
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                executor.submit(process_and_write_frame, frame)
 
-        cap.release()
-        out.release()
+def describe_stats(stats):
+    """One line summary of process_video_file's statistics, slowest stage first."""
+    stages = sorted(
+        (name for name, value in stats.items() if isinstance(value, dict)),
+        key=lambda name: stats[name]["fps"],
+    )
+    parts = [
+        f"{name} {stats[name]['fps']:.1f} fps "
+        f"({stats[name]['frames']} frames, {stats[name]['seconds']:.2f}s busy)"
+        for name in stages
+    ]
+    parts.append(f"{stats['keyframes']} keyframes")
+    parts.append(f"{stats['wall_seconds']:.2f}s wall")
+    return ", ".join(parts)
+
+
+def process_video(input_video, similarity_threshold=0.95, max_workers=4):
+    """Process video to blur faces and text, skipping similar frames with multithreading.
+
+    input_video is a path, which OpenCV reads directly, or the video's bytes (or
+    another bytes-like buffer), which are written to a temp file first.
+    """
+    temp_input_path = None
+    temp_output_path = None
+    try:
+        if isinstance(input_video, (str, os.PathLike)):
+            input_path = input_video
+        else:
+            with tempfile.NamedTemporaryFile(
+                delete=False, suffix=".mp4"
+            ) as temp_input_file:
+                temp_input_file.write(input_video)
+                temp_input_path = input_path = temp_input_file.name
 
-        with open(temp_output_path, "rb") as video_file:
-            video_bytes = video_file.read()
-            base64_encoded_video = base64.b64encode(video_bytes).decode("utf-8")
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_output_file:
+            temp_output_path = temp_output_file.name
 
-        return base64_encoded_video
+        process_video_file(
+            input_path,
+            temp_output_path,
+            similarity_threshold=similarity_threshold,
+            max_workers=max_workers,
+        )
+
+        with open(temp_output_path, "rb") as video_file:
+            return video_file.read()
 
     finally:
-        os.remove(temp_input_path)
-        if os.path.exists(temp_output_path):
+        if temp_input_path is not None:
+            os.remove(temp_input_path)
+        if temp_output_path is not None and os.path.exists(temp_output_path):
             os.remove(temp_output_path)
 
 
 # Example usage:
 # with open("path_to_input_video.mp4", "rb") as video_file:
 #     input_video_bytes = video_file.read()
-#     base64_encoded_video = process_video(input_video_bytes)
-#     # Use base64_encoded_video as needed
+#     redacted_video_bytes = process_video(input_video_bytes)
+#     # Use redacted_video_bytes as needed
+# or, without reading it into memory:
+# redacted_video_bytes = process_video("path_to_input_video.mp4")